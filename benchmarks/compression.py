@@ -0,0 +1,84 @@
+"""
+Measure the bytes saved and the CPU cost of compressing contact pages through ``CompressionMiddleware``.
+
+Each page is a JSON list of contacts like ``GET /api/contacts`` returns, with randomized names,
+addresses and phone numbers so it does not compress better than real data. For every encoding
+available in this process (gzip always, brotli and zstd when their package is installed) and every
+page size, the script sends the page through the middleware and reports the compressed size, the
+bytes saved and the median CPU time per MB of response, e.g.
+
+    python benchmarks/compression.py
+    python benchmarks/compression.py --sizes 50 500 5000 --gzip-level 1
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import string
+import sys
+import time
+from pathlib import Path
+
+from fastapi.responses import Response
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.middleware.compression import CompressionMiddleware, available_encodings  # noqa: E402
+
+
+def contacts_page(count: int, rng: random.Random) -> bytes:
+    def word(length: int) -> str:
+        return "".join(rng.choices(string.ascii_lowercase, k=length)).capitalize()
+
+    return json.dumps([{"id": i, "name": word(rng.randint(3, 10)), "lastname": word(rng.randint(4, 12)),
+                        "email": f"{word(rng.randint(4, 10)).lower()}{i}@example.com",
+                        "phone": str(rng.randint(380_000_000_000, 380_999_999_999)),
+                        "address": f"{word(rng.randint(4, 9))}, {word(rng.randint(5, 12))} street "
+                                   f"{rng.randint(1, 200)}",
+                        "birthday": f"{rng.randint(1950, 2005)}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}"}
+                       for i in range(count)]).encode()
+
+
+async def compress(body: bytes, encoding: str, gzip_level: int) -> tuple[int, float]:
+    scope = {"type": "http", "method": "GET", "path": "/", "query_string": b"",
+             "headers": [(b"accept-encoding", encoding.encode())]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = CompressionMiddleware(Response(body, media_type="application/json"), encodings=[encoding],
+                                       gzip_level=gzip_level)
+    started = time.process_time()
+    await middleware(scope, receive, send)
+    elapsed = time.process_time() - started
+    return sum(len(message.get("body", b"")) for message in sent[1:]), elapsed
+
+
+async def main(sizes: list[int], runs: int, gzip_level: int) -> None:
+    rng = random.Random(0)
+    encodings = list(available_encodings(gzip_level))
+    print(f"{'encoding':<10}{'contacts':>10}{'bytes':>12}{'compressed':>12}{'saved':>8}{'ms CPU/MB':>12}")
+    for encoding in encodings:
+        for size in sizes:
+            body = contacts_page(size, rng)
+            timings = []
+            for _ in range(runs):
+                compressed, elapsed = await compress(body, encoding, gzip_level)
+                timings.append(elapsed)
+            cpu_ms_per_mb = statistics.median(timings) * 1000 / (len(body) / 2 ** 20)
+            print(f"{encoding:<10}{size:>10}{len(body):>12}{compressed:>12}{1 - compressed / len(body):>8.0%}"
+                  f"{cpu_ms_per_mb:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=[20, 100, 500, 5000], help="contacts per page")
+    parser.add_argument("-r", "--runs", type=int, default=20, help="compressions per encoding and size")
+    parser.add_argument("--gzip-level", type=int, default=6, help="zlib compression level")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.runs, args.gzip_level))
@@ -1,17 +1,29 @@
 
-import redis.asyncio as redis
-from fastapi import FastAPI, HTTPException, Depends
+import asyncio
+import secrets
+from functools import partial
+
+from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy import text
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.middleware.compression import CompressionMiddleware
 from src.routes import auth, notes, tags, contacts, users
 
-from src.conf.config import config
+from src.services.cache import redis_client, redis_pool, tag_cache, user_cache
+from src.services.email import email_queue
+from src.services.pagination import NEXT_CURSOR_HEADER
+from src.services.serialization import default_response_class
+from src.services.sessions import get_db
+from src.services.password import password_hasher
 
-app = FastAPI()
+app = FastAPI(default_response_class=default_response_class)
 
 origins = ["*"]
 
@@ -21,6 +33,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
+)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MINIMUM_SIZE,
+    encodings=config.COMPRESSION_ENCODINGS,
+    gzip_level=config.COMPRESSION_GZIP_LEVEL,
 )
 
 
@@ -35,10 +54,25 @@ app.include_router(contacts.router, prefix='/api')
 async def startup():
     """
     Startup event handler.
-    Initialize Redis connection and FastAPILimiter.
+    Initialize FastAPILimiter on the shared Redis connection pool, subscribe to user cache invalidations
+    and warm up the tag cache.
+    """
+    await FastAPILimiter.init(redis_client)
+    app.state.user_cache_listener = asyncio.create_task(user_cache.listen())
+    await tag_cache.warm(partial(sessionmanager.session, readonly=True))
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """
+    Shutdown event handler.
+    Stop the user cache listener, close the shared Redis connection pool, the password hashing pool
+    and the database connection pool.
     """
-    r = await redis.Redis(host=config.REDIS_DOMAIN, port=config.REDIS_PORT, db=0, password=config.REDIS_PASSWORD)
-    await FastAPILimiter.init(r)
+    app.state.user_cache_listener.cancel()
+    await redis_pool.disconnect()
+    password_hasher.shutdown()
+    await sessionmanager.close()
 
 
 @app.get("/")
@@ -50,6 +84,41 @@ def index():
     return {"message": "Contacts Application"}
 
 
+metrics_bearer = HTTPBearer(auto_error=False)
+
+
+def verify_metrics_token(credentials: HTTPAuthorizationCredentials | None = Depends(metrics_bearer)):
+    """
+    Dependency restricting the metrics to scrapers holding ``METRICS_TOKEN``.
+
+    The endpoint does not exist while no token is configured.
+
+    :param credentials: The bearer token of the request, if any.
+    """
+    if not config.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials, config.METRICS_TOKEN):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token",
+                            headers={"WWW-Authenticate": "Bearer"})
+
+
+@app.get("/api/metrics", dependencies=[Depends(verify_metrics_token)])
+async def metrics():
+    """
+    Metrics endpoint.
+    Reports queue depth and throughput of the worker pools, the email queue and the database pool.
+    Requires the bearer token set in ``METRICS_TOKEN``.
+
+    :return: Metrics grouped by component.
+    """
+    try:
+        email_queue_depth = await email_queue.depth()
+    except RedisError:
+        email_queue_depth = None
+    return {"password_hasher": password_hasher.stats(), "email_queue": email_queue_depth,
+            "database": sessionmanager.pool_stats()}
+
+
 @app.get("/api/healthecker")
 async def healthchecker(db: AsyncSession = Depends(get_db)):
     """
@@ -0,0 +1,55 @@
+"""add notes and tags user id
+
+Revision ID: 3c1f6b0d9e57
+Revises: a96e7f6c742a
+Create Date: 2026-10-18 11:48:05.126377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f6b0d9e57'
+down_revision: Union[str, None] = 'a96e7f6c742a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('notes', 'tags'):
+        op.add_column(table, sa.Column('user_id', sa.Integer(), nullable=True))
+        op.create_foreign_key(f'{table}_user_id_fkey', table, 'users', ['user_id'], ['id'], ondelete='CASCADE')
+
+    # Notes attached to contacts belong to the owner of the contacts; tags to the owner of their notes.
+    # Rows without an owner stay NULL and are no longer visible through the API.
+    op.execute("UPDATE notes SET user_id = owners.user_id "
+               "FROM (SELECT a.note_id, MIN(c.user_id) AS user_id FROM contact_note_association a "
+               "JOIN contacts c ON c.id = a.contact_id GROUP BY a.note_id) AS owners "
+               "WHERE notes.id = owners.note_id")
+    op.execute("UPDATE tags SET user_id = owners.user_id "
+               "FROM (SELECT a.tag_id, MIN(n.user_id) AS user_id FROM note_tag_association a "
+               "JOIN notes n ON n.id = a.note_id GROUP BY a.tag_id) AS owners "
+               "WHERE tags.id = owners.tag_id")
+
+    op.drop_constraint('tags_name_key', 'tags', type_='unique')
+    op.create_unique_constraint('uq_tags_user_id_name', 'tags', ['user_id', 'name'])
+    # Build the indexes without locking writes on large tables.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_notes_user_id_id', 'notes', ['user_id', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_tags_user_id_id', 'tags', ['user_id', 'id'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_tags_user_id_id', table_name='tags', postgresql_concurrently=True)
+        op.drop_index('ix_notes_user_id_id', table_name='notes', postgresql_concurrently=True)
+    op.drop_constraint('uq_tags_user_id_name', 'tags', type_='unique')
+    op.create_unique_constraint('tags_name_key', 'tags', ['name'])
+    for table in ('tags', 'notes'):
+        op.drop_constraint(f'{table}_user_id_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'user_id')
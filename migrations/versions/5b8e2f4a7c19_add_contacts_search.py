@@ -0,0 +1,43 @@
+"""add contacts search
+
+Revision ID: 5b8e2f4a7c19
+Revises: 3c1f6b0d9e57
+Create Date: 2026-10-18 12:31:44.902618
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f4a7c19'
+down_revision: Union[str, None] = '3c1f6b0d9e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_TEXT = "name || ' ' || lastname || ' ' || email || ' ' || phone"
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # btree_gin lets the GIN indexes lead with user_id, so a search only visits the user's own contacts.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.execute(f"ALTER TABLE contacts ADD COLUMN search_text text GENERATED ALWAYS AS ({SEARCH_TEXT}) STORED")
+    # Also index the parts of the email, so "example" finds "john@example.com".
+    op.execute("ALTER TABLE contacts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+               f"(to_tsvector('simple', {SEARCH_TEXT} || ' ' || translate(email, '@.', '  '))) STORED")
+    # Build the indexes without locking writes on large tables.
+    with op.get_context().autocommit_block():
+        op.execute("CREATE INDEX CONCURRENTLY ix_contacts_user_id_search_vector "
+                   "ON contacts USING gin (user_id, search_vector)")
+        op.execute("CREATE INDEX CONCURRENTLY ix_contacts_user_id_search_text "
+                   "ON contacts USING gin (user_id, search_text gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_contacts_user_id_search_text")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_contacts_user_id_search_vector")
+    op.drop_column('contacts', 'search_vector')
+    op.drop_column('contacts', 'search_text')
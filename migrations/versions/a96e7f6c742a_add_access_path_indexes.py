@@ -0,0 +1,62 @@
+"""add access path indexes
+
+Revision ID: a96e7f6c742a
+Revises: d32607cb501b
+Create Date: 2026-10-18 11:02:17.540913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a96e7f6c742a'
+down_revision: Union[str, None] = 'd32607cb501b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ASSOCIATIONS = [
+    # table, primary key columns, reverse index columns
+    ('note_tag_association', ['note_id', 'tag_id'], ['tag_id', 'note_id']),
+    ('contact_note_association', ['contact_id', 'note_id'], ['note_id', 'contact_id']),
+]
+
+INDEXES = [
+    ('ix_contacts_user_id_id', 'contacts', ['user_id', 'id']),
+    ('ix_contacts_birthday_key', 'contacts', ['birthday_key']),
+    ('ix_notes_created_at_id', 'notes', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    for table, columns, _ in ASSOCIATIONS:
+        # A primary key needs non-null, unique pairs: drop incomplete links and duplicates first.
+        op.execute(f"DELETE FROM {table} WHERE {columns[0]} IS NULL OR {columns[1]} IS NULL")
+        op.execute(f"DELETE FROM {table} a USING {table} b "
+                   f"WHERE a.ctid < b.ctid AND a.{columns[0]} = b.{columns[0]} AND a.{columns[1]} = b.{columns[1]}")
+        for column in columns:
+            op.alter_column(table, column, existing_type=sa.Integer(), nullable=False)
+        op.create_primary_key(f'{table}_pkey', table, columns)
+
+    # Build the indexes without locking writes on large tables.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for table, _, reverse in ASSOCIATIONS:
+            op.create_index(f'ix_{table}_{reverse[0]}_{reverse[1]}', table, reverse, unique=False,
+                            postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, _, reverse in ASSOCIATIONS:
+            op.drop_index(f'ix_{table}_{reverse[0]}_{reverse[1]}', table_name=table, postgresql_concurrently=True)
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    for table, columns, _ in ASSOCIATIONS:
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        for column in columns:
+            op.alter_column(table, column, existing_type=sa.Integer(), nullable=True)
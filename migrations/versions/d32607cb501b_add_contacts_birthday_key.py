@@ -0,0 +1,35 @@
+"""add contacts birthday key
+
+Revision ID: d32607cb501b
+Revises: fe084db37c29
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd32607cb501b'
+down_revision: Union[str, None] = 'fe084db37c29'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('contacts', sa.Column('birthday_key', sa.SmallInteger(), nullable=True))
+    op.execute("UPDATE contacts "
+               "SET birthday_key = EXTRACT(MONTH FROM birthday) * 100 + EXTRACT(DAY FROM birthday) "
+               "WHERE birthday IS NOT NULL")
+    # Build the index without locking writes on large tables.
+    with op.get_context().autocommit_block():
+        op.create_index('ix_contacts_user_id_birthday_key', 'contacts', ['user_id', 'birthday_key'], unique=False,
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_contacts_user_id_birthday_key', table_name='contacts', postgresql_concurrently=True)
+    op.drop_column('contacts', 'birthday_key')
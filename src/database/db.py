@@ -1,22 +1,133 @@
 import contextlib
+import itertools
+import time
 
+from sqlalchemy import make_url
+from sqlalchemy.exc import TimeoutError
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-from src.conf.config import config
+from src.conf.config import config, Settings
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that also records how often and how long callers wait for a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_time += elapsed
+            self.max_wait_time = max(self.max_wait_time, elapsed)
+
+
+class ReadSession(AsyncSession):
+    """
+    Session for read-only work that gives its connection back to the pool after every statement.
+
+    Like any session it only checks out a connection on its first statement, so requests that run no
+    SQL never touch the pool. Each statement then runs in its own short transaction, which is
+    committed as soon as the statement's rows are buffered, instead of holding the connection until
+    the response has been sent. Loaded objects are not expired on commit and stay usable.
+    """
+
+    async def _release(self, result):
+        try:
+            return await result
+        except Exception:
+            await self.rollback()
+            raise
+        finally:
+            if self.in_transaction():
+                await self.commit()
+
+    async def execute(self, *args, **kwargs):
+        return await self._release(super().execute(*args, **kwargs))
+
+    async def scalar(self, *args, **kwargs):
+        return await self._release(super().scalar(*args, **kwargs))
+
+    async def get(self, *args, **kwargs):
+        return await self._release(super().get(*args, **kwargs))
+
+
+def engine_options(settings: Settings) -> dict:
+    """
+    Build the engine arguments for the application database from the settings.
+
+    :param settings: The application settings.
+    :return: Keyword arguments for ``create_async_engine``.
+    """
+    options = dict(poolclass=InstrumentedQueuePool, pool_size=settings.DB_POOL_SIZE,
+                   max_overflow=settings.DB_MAX_OVERFLOW, pool_timeout=settings.DB_POOL_TIMEOUT,
+                   pool_recycle=settings.DB_POOL_RECYCLE, pool_pre_ping=settings.DB_POOL_PRE_PING)
+    if make_url(settings.SQLALCHEMY_DATABASE_URL).drivername == "postgresql+asyncpg":
+        # SQLAlchemy prepares statements itself through its asyncpg adapter, whose cache is separate
+        # from the one of asyncpg; both follow the setting, e.g. 0 disables both behind PgBouncer.
+        options["connect_args"] = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT)},
+        }
+    return options
 
 
 class DatabaseSessionManager:
-    def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
+    def __init__(self, url: str, replica_urls: list[str] = (), strategy: str = "round_robin", **engine_kwargs):
+        self._engine: AsyncEngine | None = create_async_engine(url, **engine_kwargs)
+        self._replicas: list[AsyncEngine] = [create_async_engine(replica_url, **engine_kwargs)
+                                             for replica_url in replica_urls]
+        self._strategy = strategy
+        self._next_replica = itertools.count()
         self._session_maker: async_sessionmaker = async_sessionmaker(autoflush=False, autocommit=False,
-                                                                     bind=self._engine)
+                                                                     expire_on_commit=False, bind=self._engine)
+        self._read_session_maker: async_sessionmaker = async_sessionmaker(autoflush=False, autocommit=False,
+                                                                          expire_on_commit=False,
+                                                                          class_=ReadSession, bind=self._engine)
+
+    @property
+    def replicated(self) -> bool:
+        """
+        Whether read-only sessions may run on a replica.
+        """
+        return bool(self._replicas)
+
+    def _pick_replica(self) -> AsyncEngine:
+        if self._strategy == "least_connections":
+            return min(self._replicas, key=lambda engine: engine.pool.checkedout())
+        return self._replicas[next(self._next_replica) % len(self._replicas)]
 
     @contextlib.asynccontextmanager
-    async def session(self):
+    async def session(self, readonly: bool = False, primary: bool = False):
+        """
+        Open a session on the primary, or on a replica for read-only work when replicas are configured.
+
+        :param readonly: Whether the session only reads; it is then a :class:`ReadSession` and may run on a replica.
+        :param primary: Keep a read-only session on the primary.
+        """
         if self._session_maker is None:
             raise Exception("Session is not initialized")
-        session = self._session_maker()
+        if readonly:
+            bind = self._pick_replica() if self._replicas and not primary else self._engine
+            session = self._read_session_maker(bind=bind)
+        else:
+            session = self._session_maker()
         try:
             yield session
         except Exception as err:
@@ -25,10 +136,42 @@ class DatabaseSessionManager:
         finally:
             await session.close()
 
+    def pool_stats(self) -> dict:
+        """
+        Report the state of the connection pools.
+
+        :return: Pool size, checked out and overflow connections, and checkout wait statistics of the
+            primary, with the same statistics for each replica under ``replicas``.
+        """
+        if self._engine is None:
+            return {}
+        stats = self._engine_stats(self._engine)
+        if self._replicas:
+            stats["replicas"] = [self._engine_stats(engine) for engine in self._replicas]
+        return stats
+
+    @staticmethod
+    def _engine_stats(engine: AsyncEngine) -> dict:
+        pool = engine.pool
+        if not isinstance(pool, InstrumentedQueuePool):
+            return {"status": pool.status()}
+        return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow(),
+                "checkouts": pool.checkouts, "timeouts": pool.timeouts,
+                "wait_time": round(pool.wait_time, 6), "max_wait_time": round(pool.max_wait_time, 6)}
 
-sessionmanager = DatabaseSessionManager(config.SQLALCHEMY_DATABASE_URL)
+    async def close(self):
+        """
+        Dispose of the engines, closing all pooled connections.
+        """
+        if self._engine is None:
+            return
+        for engine in [self._engine, *self._replicas]:
+            await engine.dispose()
+        self._engine = None
+        self._replicas = []
+        self._session_maker = None
+        self._read_session_maker = None
 
 
-async def get_db():
-    async with sessionmanager.session() as session:
-        yield session
+sessionmanager = DatabaseSessionManager(config.SQLALCHEMY_DATABASE_URL, config.SQLALCHEMY_REPLICA_URLS,
+                                        config.DB_REPLICA_STRATEGY, **engine_options(config))
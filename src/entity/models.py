@@ -1,6 +1,7 @@
 from datetime import date, datetime, timedelta
-from sqlalchemy import Column, Integer, String, Boolean, func, Table, DateTime
-from sqlalchemy.orm import Mapped, relationship, DeclarativeBase
+from sqlalchemy import (Column, Integer, SmallInteger, String, Boolean, func, Table, DateTime, Index, UniqueConstraint,
+                        DDL, event)
+from sqlalchemy.orm import Mapped, relationship, DeclarativeBase, validates
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import DateTime, Date
@@ -10,6 +11,18 @@ class Base(DeclarativeBase):
     pass
 
 
+def birthday_key(birthday: date | None) -> int | None:
+    """
+    Day of the year of a birthday as month * 100 + day, e.g. 1231 for December 31.
+
+    :param birthday: The birthday.
+    :return: The key, or None if there is no birthday.
+    """
+    if birthday is None:
+        return None
+    return birthday.month * 100 + birthday.day
+
+
 class Contact(Base):
     __tablename__ = "contacts"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -20,16 +33,31 @@ class Contact(Base):
     address: Mapped[str] = mapped_column(String(100), nullable=False)
     # birthday: Mapped[datetime.datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     birthday: Mapped[datetime.date] = mapped_column(Date)
+    birthday_key: Mapped[int] = mapped_column(SmallInteger, nullable=True)
 
     created_at: Mapped[date] = mapped_column('created_at', DateTime, default=func.now(), nullable=True)
     updated_at: Mapped[date] = mapped_column('updated_at', DateTime, default=func.now(), onupdate=func.now(),
                                              nullable=True)
 
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=True)
-    user: Mapped["User"] = relationship("User", backref="todos", lazy="joined")
+    # No contact query needs the owner, so it is never loaded; a future one must opt in, e.g. with joinedload.
+    user: Mapped["User"] = relationship("User", backref="todos", lazy="raise")
 
     notes = relationship("Note", secondary="contact_note_association")
 
+    # The generated search_text and search_vector columns and their GIN indexes need PostgreSQL, so only
+    # migration 5b8e2f4a7c19 creates them and migrations/env.py hides them from autogenerate.
+    __table_args__ = (
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_birthday_key", "user_id", "birthday_key"),
+        Index("ix_contacts_birthday_key", "birthday_key"),
+    )
+
+    @validates("birthday")
+    def validate_birthday(self, key, value):
+        self.birthday_key = birthday_key(value)
+        return value
+
 
 class Note(Base):
     __tablename__ = "notes"
@@ -38,14 +66,26 @@ class Note(Base):
     created_at: Mapped[int] = mapped_column(DateTime, default=func.now())
     description: Mapped[int] = mapped_column(String(150), nullable=False)
     done: Mapped[bool] = mapped_column(Boolean, default=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=True)
 
     tags = relationship("Tag", secondary="note_tag_association")
 
+    __table_args__ = (
+        Index("ix_notes_created_at_id", "created_at", "id"),
+        Index("ix_notes_user_id_id", "user_id", "id"),
+    )
+
 
 class Tag(Base):
     __tablename__ = "tags"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    name: Mapped[str] = mapped_column(String(25), nullable=False, unique=True)
+    name: Mapped[str] = mapped_column(String(25), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id', ondelete="CASCADE"), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "name", name="uq_tags_user_id_name"),
+        Index("ix_tags_user_id_id", "user_id", "id"),
+    )
 
 
 class User(Base):
@@ -61,16 +101,39 @@ class User(Base):
     confirmed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=True)
 
 
+# The primary keys serve lookups from the first column; the reverse indexes serve the other direction.
 note_tag_association = Table(
     "note_tag_association",
     Base.metadata,
-    Column("note_id", Integer, ForeignKey("notes.id", ondelete="CASCADE")),
-    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"))
+    Column("note_id", Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_note_tag_association_tag_id_note_id", "tag_id", "note_id"),
 )
 
 contact_note_association = Table(
     "contact_note_association",
     Base.metadata,
-    Column("contact_id", Integer, ForeignKey("contacts.id", ondelete="CASCADE")),
-    Column("note_id", Integer, ForeignKey("notes.id", ondelete="CASCADE"))
+    Column("contact_id", Integer, ForeignKey("contacts.id", ondelete="CASCADE"), primary_key=True),
+    Column("note_id", Integer, ForeignKey("notes.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_contact_note_association_note_id_contact_id", "note_id", "contact_id"),
 )
+
+# Postgres searches contacts through generated tsvector and trigram columns added by a migration. SQLite has
+# neither, so tests search an FTS5 index of the same columns, kept in sync with the table by triggers.
+_CONTACTS_FTS_COLUMNS = "name, lastname, email, phone"
+for _ddl in (
+    f"CREATE VIRTUAL TABLE contacts_fts USING fts5({_CONTACTS_FTS_COLUMNS}, content='contacts', content_rowid='id')",
+    f"CREATE TRIGGER contacts_fts_insert AFTER INSERT ON contacts BEGIN "
+    f"INSERT INTO contacts_fts(rowid, {_CONTACTS_FTS_COLUMNS}) "
+    f"VALUES (new.id, new.name, new.lastname, new.email, new.phone); END",
+    f"CREATE TRIGGER contacts_fts_delete AFTER DELETE ON contacts BEGIN "
+    f"INSERT INTO contacts_fts(contacts_fts, rowid, {_CONTACTS_FTS_COLUMNS}) "
+    f"VALUES ('delete', old.id, old.name, old.lastname, old.email, old.phone); END",
+    f"CREATE TRIGGER contacts_fts_update AFTER UPDATE ON contacts BEGIN "
+    f"INSERT INTO contacts_fts(contacts_fts, rowid, {_CONTACTS_FTS_COLUMNS}) "
+    f"VALUES ('delete', old.id, old.name, old.lastname, old.email, old.phone); "
+    f"INSERT INTO contacts_fts(rowid, {_CONTACTS_FTS_COLUMNS}) "
+    f"VALUES (new.id, new.name, new.lastname, new.email, new.phone); END",
+):
+    event.listen(Contact.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+event.listen(Contact.__table__, "before_drop", DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,58 @@
+import json
+from dataclasses import dataclass
+
+from src.entity.models import User
+
+
+@dataclass(slots=True, frozen=True)
+class Principal:
+    """
+    Authenticated user as seen by request handlers.
+
+    Carries identity only, never the password hash or refresh token, and is immutable so one
+    instance can be shared between concurrent requests through the user cache.
+    """
+
+    VERSION = 1
+
+    id: int
+    email: str
+    username: str
+    avatar: str | None
+    confirmed: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        """
+        Build a principal from a User loaded from the database.
+
+        :param user: The User object.
+        :return: The matching Principal.
+        """
+        return cls(id=user.id, email=user.email, username=user.username, avatar=user.avatar,
+                   confirmed=bool(user.confirmed))
+
+    def dumps(self) -> bytes:
+        """
+        Encode the principal as a compact, versioned JSON array.
+
+        :return: The encoded principal.
+        """
+        return json.dumps([self.VERSION, self.id, self.email, self.username, self.avatar, self.confirmed],
+                          separators=(",", ":")).encode()
+
+    @classmethod
+    def loads(cls, value: bytes) -> "Principal | None":
+        """
+        Decode a principal produced by :meth:`dumps`.
+
+        :param value: The encoded principal.
+        :return: The Principal, or None if the value was written by another version or is malformed.
+        """
+        try:
+            version, *fields = json.loads(value)
+            if version != cls.VERSION:
+                return None
+            return cls(*fields)
+        except (ValueError, TypeError):
+            return None
@@ -0,0 +1,201 @@
+import zlib
+from typing import Callable, Iterable, Union
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Media that is already compressed only costs CPU to compress again.
+EXCLUDED_CONTENT_TYPES = ("image/png", "image/jpeg", "image/gif", "image/webp", "image/avif", "video/", "audio/",
+                          "font/woff", "application/zip", "application/gzip", "application/x-gzip",
+                          "application/zstd", "application/x-7z-compressed", "application/x-rar-compressed")
+
+
+class GzipCompressor:
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+Compressor = Union[GzipCompressor, BrotliCompressor, ZstdCompressor]
+
+
+def available_encodings(gzip_level: int = 6, brotli_quality: int = 4,
+                        zstd_level: int = 3) -> dict[str, Callable[[], Compressor]]:
+    """
+    List the content codings this process can produce, brotli and zstd only when their package is installed.
+
+    :param gzip_level: The zlib compression level, from 1 to 9.
+    :param brotli_quality: The brotli quality, from 0 to 11.
+    :param zstd_level: The zstd compression level, from 1 to 22.
+    :return: Factories of compressors by content coding.
+    """
+    encodings = {"gzip": lambda: GzipCompressor(gzip_level)}
+    if brotli is not None:
+        encodings["br"] = lambda: BrotliCompressor(brotli_quality)
+    if zstandard is not None:
+        encodings["zstd"] = lambda: ZstdCompressor(zstd_level)
+    return encodings
+
+
+def negotiate(accept_encoding: str | None, preferred: Iterable[str]) -> str | None:
+    """
+    Pick the content coding of a response from the ``Accept-Encoding`` header of the request.
+
+    :param accept_encoding: The value of the header, if any.
+    :param preferred: The codings the server can produce, most preferred first.
+    :return: The acceptable coding with the highest weight, ties going to the server's preference, or None.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for coding in preferred:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies with gzip, brotli or zstd, as negotiated with the client.
+
+    Bodies sent in one message are compressed only from ``minimum_size`` bytes. Streamed bodies, such as
+    the exports, are compressed chunk by chunk and flushed after each one, so clients still receive
+    every chunk as soon as it is produced. Responses that are already encoded or whose media type is
+    already compressed pass through. The ETag of a compressed response is made weak, so the
+    If-None-Match revalidation of the response cache keeps matching it.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1000, encodings: Iterable[str] = ("zstd", "br", "gzip"),
+                 gzip_level: int = 6, brotli_quality: int = 4, zstd_level: int = 3,
+                 excluded_content_types: tuple[str, ...] = EXCLUDED_CONTENT_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        available = available_encodings(gzip_level, brotli_quality, zstd_level)
+        self.encodings = {encoding: available[encoding] for encoding in encodings if encoding in available}
+        self.excluded_content_types = excluded_content_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start: Message | None = None
+        self.compressor: Compressor | None = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+        body, more_body = message.get("body", b""), message.get("more_body", False)
+        if self.compressor is None:
+            if self._skip(body, more_body):
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            self.compressor = self.middleware.encodings[self.encoding]()
+            headers = MutableHeaders(scope=self.start)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if etag := headers.get("etag"):
+                headers["ETag"] = etag if etag.startswith("W/") else f"W/{etag}"
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self.start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self.start)
+        if more_body:
+            body = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            body = self.compressor.compress(body) + self.compressor.finish()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def _skip(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start["headers"])
+        if self.start["status"] < 200 or self.start["status"] in (204, 304) or "content-encoding" in headers:
+            return True
+        if headers.get("content-type", "").startswith(self.middleware.excluded_content_types):
+            return True
+        return not more_body and len(body) < self.middleware.minimum_size
@@ -1,102 +1,250 @@
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Integer, bindparam, delete, insert, literal, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from src.entity.models import Tag, Note
-from src.schemas.schemas import NoteModel, NoteUpdate, NoteStatusUpdate
+from src.entity.models import Tag, Note, note_tag_association
+from src.entity.principal import Principal
+from src.repository import tags as repository_tags
+from src.schemas.schemas import (NoteModel, NoteUpdate, NoteStatusUpdate, NoteBatchUpdate, NoteBatchError,
+                                 NoteBatchResult)
+from src.services.http_cache import response_cache
 
 
-async def get_notes(skip: int, offset: int, db: AsyncSession):
+async def get_notes(skip: int, offset: int, db: AsyncSession, user: Principal, after: int | None = None):
     """
-    Retrieve a list of notes from the database.
+    Retrieve a list of notes for a specific user from the database.
 
-    :param skip: The number of notes to skip.
+    :param skip: The number of notes to skip; ignored when ``after`` is given.
     :param offset: The maximum number of notes to retrieve.
     :param db: AsyncSession instance for database interaction.
-    :return: A list of Note objects.
+    :param user: Principal object representing the owner of the notes.
+    :param after: Only return notes with an ID greater than this one (keyset pagination).
+    :return: A list of Note objects ordered by ID, with their tags loaded in one batched query.
     """
-    stmt = select(Note).offset(skip).limit(offset)
+    stmt = (select(Note).options(selectinload(Note.tags)).filter_by(user_id=user.id)
+            .order_by(Note.id).limit(offset))
+    stmt = stmt.filter(Note.id > after) if after is not None else stmt.offset(skip)
     result = await db.execute(stmt)
     return result.scalars().all()
 
 
-async def get_note(note_id: int, db: AsyncSession) -> Note:
+async def get_note(note_id: int, db: AsyncSession, user: Principal) -> Note:
     """
-    Retrieve a specific note by its ID from the database.
+    Retrieve a specific note of a user by its ID from the database.
 
     :param note_id: The ID of the note to retrieve.
     :param db: AsyncSession instance for database interaction.
-    :return: The Note object corresponding to the given ID, if found.
+    :param user: Principal object representing the owner of the note.
+    :return: The Note object corresponding to the given ID with its tags, if found.
     """
-    result = await db.execute(select(Note).filter(Note.id == note_id))
+    stmt = select(Note).options(selectinload(Note.tags)).filter_by(id=note_id, user_id=user.id)
+    result = await db.execute(stmt)
     return result.scalar()
 
 
-async def create_note(body: NoteModel, db: AsyncSession) -> Note:
+async def create_note(body: NoteModel, db: AsyncSession, user: Principal) -> Note:
     """
     Create a new note in the database.
 
-    :param body: Data representing the new note.
+    :param body: Data representing the new note; tags of other users are ignored.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the note.
     :return: The newly created Note object.
     """
-    async with db.begin():
-        tags = await db.execute(select(Tag).filter(Tag.id.in_(body.tags)))
-        note = Note(title=body.title, description=body.description, tags=tags.scalars().all())
-        db.add(note)
-        await db.commit()
-        await db.refresh(note)
+    tags = await repository_tags.get_tags_by_id(body.tags, db, user)
+    note = Note(title=body.title, description=body.description, user_id=user.id)
+    db.add(note)
+    await db.flush()
+    await _set_tags(note, tags, db, user)
+    await db.commit()
+    await db.refresh(note, ["created_at"])
+    await response_cache.invalidate(user.id)
     return note
 
 
-async def remove_note(note_id: int, db: AsyncSession) -> Note | None:
+async def remove_note(note_id: int, db: AsyncSession, user: Principal) -> Note | None:
     """
     Remove a note from the database.
 
     :param note_id: The ID of the note to remove.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the note.
     :return: The removed Note object, if found and deleted; otherwise, None.
     """
-    async with db.begin():
-        note = await db.execute(select(Note).filter(Note.id == note_id))
-        if existing := note.scalar():
-            await db.delete(existing)
-            await db.commit()
-        return existing
+    # The association rows go with the note through ON DELETE CASCADE, so read its tags first.
+    tags = await db.execute(select(Tag).join(note_tag_association)
+                            .filter(note_tag_association.c.note_id == note_id, Tag.user_id == user.id))
+    result = await db.execute(delete(Note).filter_by(id=note_id, user_id=user.id).returning(Note))
+    if existing := result.scalar_one_or_none():
+        set_committed_value(existing, "tags", tags.scalars().all())
+        await db.commit()
+        await response_cache.invalidate(user.id)
+    return existing
 
 
-async def update_note(note_id: int, body: NoteUpdate, db: AsyncSession) -> Note | None:
+async def update_note(note_id: int, body: NoteUpdate, db: AsyncSession, user: Principal) -> Note | None:
     """
     Update an existing note in the database.
 
     :param note_id: The ID of the note to update.
-    :param body: Data representing the updated note information.
+    :param body: Data representing the updated note information; tags of other users are ignored.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the note.
     :return: The updated Note object, if found and updated; otherwise, None.
     """
-    async with db.begin():
-        note = await db.execute(select(Note).filter(Note.id == note_id))
-        if existing := note.scalar():
-            tags = await db.execute(select(Tag).filter(Tag.id.in_(body.tags)))
-            existing.title = body.title
-            existing.description = body.description
-            existing.done = body.done
-            existing.tags = tags.scalars().all()
-            await db.commit()
-        return existing
+    if existing := await get_note(note_id, db, user):
+        existing.title = body.title
+        existing.description = body.description
+        existing.done = body.done
+        await db.execute(delete(note_tag_association).filter(note_tag_association.c.note_id == note_id))
+        await _set_tags(existing, await repository_tags.get_tags_by_id(body.tags, db, user), db, user)
+        await db.commit()
+        await response_cache.invalidate(user.id)
+    return existing
 
 
-async def update_status_note(note_id: int, body: NoteStatusUpdate, db: AsyncSession) -> Note | None:
+async def update_status_note(note_id: int, body: NoteStatusUpdate, db: AsyncSession, user: Principal) -> Note | None:
     """
     Update the status (done or not done) of a note in the database.
 
     :param note_id: The ID of the note to update.
     :param body: Data representing the updated note status.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the note.
     :return: The updated Note object, if found and status updated; otherwise, None.
     """
-    async with db.begin():
-        note = await db.execute(select(Note).filter(Note.id == note_id))
-        if existing := note.scalar():
-            existing.done = body.done
-            await db.commit()
-        return existing
+    stmt = (update(Note).filter_by(id=note_id, user_id=user.id).values(done=body.done).returning(Note)
+            .options(selectinload(Note.tags)))
+    result = await db.execute(stmt)
+    if existing := result.scalar_one_or_none():
+        await db.commit()
+        await response_cache.invalidate(user.id)
+    return existing
+
+
+async def _set_tags(note: Note, tags: list[Tag], db: AsyncSession, user: Principal) -> None:
+    # The tags may come from the tag cache, so only link the ones that still exist in the database.
+    linked = set()
+    if tags:
+        stmt = (insert(note_tag_association)
+                .from_select(["note_id", "tag_id"],
+                             select(literal(note.id, Integer), Tag.id)
+                             .filter(Tag.id.in_([tag.id for tag in tags]), Tag.user_id == user.id))
+                .returning(note_tag_association.c.tag_id))
+        linked = set((await db.execute(stmt)).scalars().all())
+    set_committed_value(note, "tags", [tag for tag in tags if tag.id in linked])
+
+
+def _validate_batch(items: list[Any], model: type[BaseModel], result: NoteBatchResult) -> list[tuple[int, Any]]:
+    valid = []
+    for index, raw in enumerate(items):
+        try:
+            valid.append((index, model.model_validate(raw)))
+        except ValidationError as err:
+            detail = "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err.errors())
+            result.errors.append(NoteBatchError(index=index, detail=detail))
+    return valid
+
+
+async def _owned_tag_ids(bodies: list[Any], db: AsyncSession, user: Principal) -> set[int]:
+    tag_ids = sorted({tag_id for body in bodies if body.tags for tag_id in body.tags})
+    return {tag.id for tag in await repository_tags.get_tags_by_id(tag_ids, db, user)}
+
+
+def _tag_links(note_id: int, tag_ids: list[int], owned: set[int]) -> list[dict]:
+    return [{"link_note_id": note_id, "link_tag_id": tag_id} for tag_id in dict.fromkeys(tag_ids) if tag_id in owned]
+
+
+def _insert_tag_links(user: Principal):
+    # Run once per link; the SELECT drops tags deleted since the tag cache was filled.
+    return insert(note_tag_association).from_select(
+        ["note_id", "tag_id"],
+        select(bindparam("link_note_id", type_=Integer), Tag.id)
+        .filter(Tag.id == bindparam("link_tag_id"), Tag.user_id == user.id))
+
+
+async def create_notes(items: list[Any], db: AsyncSession, user: Principal) -> NoteBatchResult:
+    """
+    Create many notes in one transaction.
+
+    The notes are written with a single multi-row INSERT ... RETURNING and their tags with one more
+    INSERT ... SELECT into the association table, whatever the size of the batch. Invalid items are
+    reported by their index and do not abort the others; tags of other users are ignored.
+
+    :param items: The raw notes to create.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the notes.
+    :return: The IDs of the created notes in item order and the per-item errors.
+    """
+    result = NoteBatchResult()
+    valid = _validate_batch(items, NoteModel, result)
+    if not valid:
+        return result
+    bodies = [body for _, body in valid]
+    owned = await _owned_tag_ids(bodies, db, user)
+    stmt = insert(Note).returning(Note.id, sort_by_parameter_order=True)
+    inserted = await db.execute(stmt, [{"title": body.title, "description": body.description, "user_id": user.id}
+                                       for body in bodies])
+    result.ids = list(inserted.scalars().all())
+    if links := [link for note_id, body in zip(result.ids, bodies) for link in _tag_links(note_id, body.tags, owned)]:
+        await db.execute(_insert_tag_links(user), links)
+    await db.commit()
+    await response_cache.invalidate(user.id)
+    return result
+
+
+async def update_notes(items: list[Any], db: AsyncSession, user: Principal) -> NoteBatchResult:
+    """
+    Partially update many notes in one transaction, e.g. to mark them done.
+
+    Only the fields present in an item are changed, and ``tags`` replaces the tags of the note. The
+    ownership of every note is checked with one SELECT, the rows are changed with one bulk UPDATE by
+    primary key, and the replaced tags with one DELETE and one INSERT ... SELECT into the association table.
+
+    :param items: The raw changes, each with the ``id`` of the note to update.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the notes.
+    :return: The IDs of the updated notes in item order and the per-item errors.
+    """
+    result = NoteBatchResult()
+    valid = []
+    seen = set()
+    for index, body in _validate_batch(items, NoteBatchUpdate, result):
+        if body.id in seen:
+            result.errors.append(NoteBatchError(index=index, id=body.id, detail="Duplicate note in batch"))
+            continue
+        seen.add(body.id)
+        valid.append((index, body))
+    if not valid:
+        return result
+
+    found = await db.execute(select(Note.id).filter(Note.id.in_(seen), Note.user_id == user.id))
+    found = set(found.scalars().all())
+    bodies = []
+    for index, body in valid:
+        if body.id in found:
+            bodies.append(body)
+        else:
+            result.errors.append(NoteBatchError(index=index, id=body.id, detail="Note not found"))
+    result.errors.sort(key=lambda error: error.index)
+    if not bodies:
+        return result
+
+    if values := [{"id": body.id, **changes} for body in bodies
+                  if (changes := body.model_dump(exclude_unset=True, exclude_none=True, exclude={"id", "tags"}))]:
+        await db.execute(update(Note), values)
+    if retagged := [body for body in bodies if body.tags is not None]:
+        owned = await _owned_tag_ids(retagged, db, user)
+        await db.execute(delete(note_tag_association)
+                         .filter(note_tag_association.c.note_id.in_([body.id for body in retagged])))
+        if links := [link for body in retagged for link in _tag_links(body.id, body.tags, owned)]:
+            await db.execute(_insert_tag_links(user), links)
+    await db.commit()
+    await response_cache.invalidate(user.id)
+    result.ids = [body.id for body in bodies]
+    return result
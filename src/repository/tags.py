@@ -1,83 +1,122 @@
+from sqlalchemy import delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 
 from src.entity.models import Tag
+from src.entity.principal import Principal
 from src.schemas.schemas import TagModel
+from src.services.cache import tag_cache
+from src.services.http_cache import response_cache
 
 
-async def get_tags(skip: int, limit: int, db: AsyncSession):
+async def get_tags(skip: int, limit: int, db: AsyncSession, user: Principal, after: int | None = None):
     """
-    Retrieve a list of tags from the database.
+    Retrieve a list of tags for a specific user from the database.
 
-    :param skip: Number of tags to skip.
+    :param skip: Number of tags to skip; ignored when ``after`` is given.
     :param limit: Maximum number of tags to retrieve.
     :param db: AsyncSession instance for database interaction.
-    :return: List of Tag objects.
+    :param user: Principal object representing the owner of the tags.
+    :param after: Only return tags with an ID greater than this one (keyset pagination).
+    :return: List of Tag objects ordered by ID.
     """
-    stmt = select(Tag).offset(skip).limit(limit)
+    stmt = select(Tag).filter_by(user_id=user.id).order_by(Tag.id).limit(limit)
+    stmt = stmt.filter(Tag.id > after) if after is not None else stmt.offset(skip)
     result = await db.execute(stmt)
     return result.scalars().all()
 
 
-async def get_tag(tag_id: int, db: AsyncSession) -> Tag:
+async def get_tag(tag_id: int, db: AsyncSession, user: Principal) -> Tag:
     """
-    Retrieve a specific tag by its ID from the database.
+    Retrieve a specific tag of a user by its ID, from the tag cache or the database.
 
     :param tag_id: ID of the tag to retrieve.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the tag.
     :return: Tag object corresponding to the given ID, if found.
     """
-    stmt = select(Tag).filter(Tag.id == tag_id)
-    result = await db.execute(stmt)
-    return result.scalar_one_or_none()
+    tags = await get_tags_by_id([tag_id], db, user)
+    return tags[0] if tags else None
+
+
+async def get_tags_by_id(tag_ids: list[int], db: AsyncSession, user: Principal) -> list[Tag]:
+    """
+    Retrieve tags of a user by their IDs, reading the database only for the ones missing from the tag cache.
 
+    The tags are attached to the session without loading them, so they can be assigned to notes directly.
 
-async def create_tag(body: TagModel, db: AsyncSession) -> Tag:
+    :param tag_ids: IDs of the tags to retrieve; IDs of other users' tags are ignored.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the tags.
+    :return: List of Tag objects ordered by ID.
+    """
+    names = await tag_cache.get_many(user.id, tag_ids)
+    if missing := [tag_id for tag_id in tag_ids if tag_id not in names]:
+        result = await db.execute(select(Tag.id, Tag.name).filter(Tag.id.in_(missing), Tag.user_id == user.id))
+        if loaded := dict(result.tuples().all()):
+            names.update(loaded)
+            await tag_cache.set_many({user.id: loaded})
+    tags = []
+    for tag_id in sorted(names):
+        tag = Tag(id=tag_id, name=names[tag_id], user_id=user.id)
+        make_transient_to_detached(tag)
+        tags.append(await db.merge(tag, load=False))
+    return tags
+
+
+async def create_tag(body: TagModel, db: AsyncSession, user: Principal) -> Tag:
     """
     Create a new tag in the database.
 
     :param body: Data representing the new tag.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the tag.
     :return: Newly created Tag object.
     """
-    tag = Tag(name=body.name)
+    tag = Tag(name=body.name, user_id=user.id)
     db.add(tag)
     await db.commit()
     await db.refresh(tag)
+    await tag_cache.set_many({user.id: {tag.id: tag.name}})
+    await response_cache.invalidate(user.id)
     return tag
 
 
-async def update_tag(tag_id: int, body: TagModel, db: AsyncSession) -> Tag | None:
+async def update_tag(tag_id: int, body: TagModel, db: AsyncSession, user: Principal) -> Tag | None:
     """
     Update an existing tag in the database.
 
     :param tag_id: ID of the tag to update.
     :param body: Data representing the updated tag information.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the tag.
     :return: Updated Tag object, if found and updated; otherwise, None.
     """
-    stmt = select(Tag).filter(Tag.id == tag_id)
+    stmt = update(Tag).filter_by(id=tag_id, user_id=user.id).values(name=body.name).returning(Tag)
     result = await db.execute(stmt)
     tag = result.scalar_one_or_none()
     if tag:
-        tag.name = body.name
         await db.commit()
+        await tag_cache.set_many({user.id: {tag.id: tag.name}})
+        await response_cache.invalidate(user.id)
     return tag
 
 
-async def remove_tag(tag_id: int, db: AsyncSession) -> Tag | None:
+async def remove_tag(tag_id: int, db: AsyncSession, user: Principal) -> Tag | None:
     """
     Remove a tag from the database.
 
     :param tag_id: ID of the tag to remove.
     :param db: AsyncSession instance for database interaction.
+    :param user: Principal object representing the owner of the tag.
     :return: Removed Tag object, if found and deleted; otherwise, None.
     """
-    stmt = select(Tag).filter(Tag.id == tag_id)
+    stmt = delete(Tag).filter_by(id=tag_id, user_id=user.id).returning(Tag)
     result = await db.execute(stmt)
     tag = result.scalar_one_or_none()
     if tag:
-        await db.delete(tag)
         await db.commit()
+        await tag_cache.delete(user.id, tag.id)
+        await response_cache.invalidate(user.id)
     return tag
@@ -1,11 +1,12 @@
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from libgravatar import Gravatar
 
-from src.database.db import get_db
+from src.services.sessions import get_db
 from src.entity.models import User
 from src.schemas.user import UserSchema
+from src.services.cache import user_cache
 
 
 async def get_user_by_email(email: str, db: AsyncSession = Depends(get_db)):
@@ -54,6 +55,7 @@ async def update_token(user: User, token: str | None, db: AsyncSession):
    """
     user.refresh_token = token
     await db.commit()
+    await user_cache.invalidate(user.email)
 
 
 async def confirmed_email(email: str, db: AsyncSession) -> None:
@@ -63,9 +65,9 @@ async def confirmed_email(email: str, db: AsyncSession) -> None:
     :param email: The email address of the user to confirm.
     :param db: AsyncSession instance for database interaction.
     """
-    user = await get_user_by_email(email, db)
-    user.confirmed = True
+    await db.execute(update(User).filter_by(email=email).values(confirmed=True))
     await db.commit()
+    await user_cache.invalidate(email)
 
 
 async def update_avatar_url(email: str, url: str | None, db: AsyncSession) -> User:
@@ -77,8 +79,8 @@ async def update_avatar_url(email: str, url: str | None, db: AsyncSession) -> Us
     :param db: AsyncSession instance for database interaction.
     :return: The updated User object.
     """
-    user = await get_user_by_email(email, db)
-    user.avatar = url
+    result = await db.execute(update(User).filter_by(email=email).values(avatar=url).returning(User))
+    user = result.scalar_one()
     await db.commit()
-    await db.refresh(user)
+    await user_cache.invalidate(email)
     return user
@@ -1,24 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.services.sessions import get_db
 from src.repository import users as repositories_users
 from src.schemas.user import UserSchema, TokenSchema,UserResponse, RequestEmail
 from src.services.auth import auth_service
-from src.services.email import send_email
+from src.services.email import enqueue_email
+from src.services.password import password_hasher
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 get_refresh_token = HTTPBearer()
 
 
 @router.post("/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def signup(body: UserSchema, bt: BackgroundTasks, request:Request, db: AsyncSession = Depends(get_db)):
+async def signup(body: UserSchema, request:Request, db: AsyncSession = Depends(get_db)):
     """
     Register a new user.
 
     :param body: Data representing the new user.
-    :param bt: BackgroundTasks to run email sending asynchronously.
     :param request: Request object to retrieve base URL.
     :param db: AsyncSession instance for database interaction.
     :return: Newly created UserResponse object.
@@ -26,9 +26,9 @@ async def signup(body: UserSchema, bt: BackgroundTasks, request:Request, db: Asy
     exist_user = await repositories_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await password_hasher.hash(body.password)
     new_user = await repositories_users.create_user(body, db)
-    bt.add_task(send_email, new_user.email, new_user.username, str(request.base_url))
+    await enqueue_email(new_user.email, new_user.username, str(request.base_url))
     return new_user
 
 
@@ -46,7 +46,7 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession =
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
-    if not auth_service.verify_password(body.password, user.password):
+    if not await password_hasher.verify(body.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
     # Generate JWT
     access_token = await auth_service.create_access_token(data={"sub": user.email, "test": "ВалЄра"})
@@ -98,13 +98,11 @@ async def confirmed_email(token: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.post('/request_email')
-async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
-                        db: AsyncSession = Depends(get_db)):
+async def request_email(body: RequestEmail, request: Request, db: AsyncSession = Depends(get_db)):
     """
     Request email confirmation.
 
     :param body: RequestEmail containing email address.
-    :param background_tasks: BackgroundTasks to run email sending asynchronously.
     :param request: Request object to retrieve base URL.
     :param db: AsyncSession instance for database interaction.
     :return: Success message if email is requested for confirmation.
@@ -114,5 +112,5 @@ async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, r
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(send_email, user.email, user.username, str(request.base_url))
+        await enqueue_email(user.email, user.username, str(request.base_url))
     return {"message": "Check your email for confirmation."}
\ No newline at end of file
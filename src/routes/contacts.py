@@ -1,68 +1,176 @@
-from typing import List
+import csv
+import io
+from typing import Any, List
 
-from fastapi import APIRouter, HTTPException, Depends, status, Query, Path
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Path, Response, Body, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.entity.models import User
-from src.schemas.schemas import ContactBase, ContactResponse, ContactCreate, ContactUpdate
+from src.services.sessions import get_db, get_read_db
+from src.entity.principal import Principal
+from src.schemas.schemas import (ContactBase, ContactResponse, ContactCreate, ContactUpdate, ContactImportResult,
+                                 ContactSuggestion)
 from src.repository import contacts as repository_contacts
+from src.conf.config import config
 from src.services.auth import auth_service
+from src.services.autocomplete import autocomplete
+from src.services.export import csv_chunks, ndjson_chunks
+from src.services.http_cache import CachedResponse, cached_response
+from src.services.pagination import after_cursor, ranked_cursor, set_next_cursor
+from src.services.serialization import json_response
 
 router = APIRouter(prefix='/contacts', tags=["contacts"])
 
 
 @router.get("/", response_model=List[ContactResponse])
-async def get_contacts(limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
-                       db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
+async def get_contacts(response: Response, limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
+                       after: int | None = Depends(after_cursor), cache: CachedResponse = Depends(cached_response),
+                       db: AsyncSession = Depends(get_read_db),
+                       user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve a list of contacts.
 
+    Pass the ``X-Next-Cursor`` header of a page as ``after`` to fetch the next one in constant time.
+    Pages are cached until the contacts change; send their ``ETag`` as ``If-None-Match`` to get a 304.
+
+    :param response: Response used to return the cursor of the next page.
     :param limit: Maximum number of contacts to retrieve (between 10 and 500).
-    :param offset: Number of contacts to skip.
+    :param offset: Number of contacts to skip; ignored when ``after`` is given.
+    :param after: Cursor of the previous page.
+    :param cache: Cached response of the request.
     :param db: AsyncSession instance for database interaction.
     :param user: Current authenticated user.
     :return: List of ContactResponse objects.
     """
-    contacts = await repository_contacts.get_contacts(limit, offset, db, user)  # Змінено на get_contacts()
-    return contacts
+    if cache.hit:
+        return cache.response()
+    contacts = await repository_contacts.get_contacts(limit, offset, db, user, after)  # Змінено на get_contacts()
+    set_next_cursor(response, contacts, limit)
+    return await cache.render(contacts, List[ContactResponse], response)
 
 
 @router.get("/all", response_model=list[ContactResponse])
-async def get_all_contacts(limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
-                           db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
+async def get_all_contacts(response: Response, limit: int = Query(10, ge=10, le=500),
+                           offset: int = Query(0, ge=0), after: int | None = Depends(after_cursor),
+                           db: AsyncSession = Depends(get_read_db), user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve all contacts without user filtering.
 
+    :param response: Response used to return the cursor of the next page.
     :param limit: Maximum number of contacts to retrieve (between 10 and 500).
-    :param offset: Number of contacts to skip.
+    :param offset: Number of contacts to skip; ignored when ``after`` is given.
+    :param after: Cursor of the previous page.
+    :param db: AsyncSession instance for database interaction.
+    :return: List of ContactResponse objects.
+    """
+    contacts = await repository_contacts.get_all_contacts(limit, offset, db, after)
+    set_next_cursor(response, contacts, limit)
+    return json_response(contacts, List[ContactResponse], response)
+
+
+@router.get("/export")
+async def export_contacts(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: AsyncSession = Depends(get_read_db),
+                          user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Export all contacts of the current user.
+
+    Rows are streamed from a server-side cursor and encoded batch by batch, so the response is
+    produced in constant memory whatever the size of the address book.
+
+    :param format: Output format, ``ndjson`` or ``csv``.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Current authenticated user.
+    :return: StreamingResponse with the encoded contacts.
+    """
+    batches = repository_contacts.stream_contacts(db, user)
+    if format == "csv":
+        return StreamingResponse(csv_chunks(batches), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="contacts.csv"'})
+    return StreamingResponse(ndjson_chunks(batches), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": 'attachment; filename="contacts.ndjson"'})
+
+
+@router.get("/birthdays", response_model=List[ContactResponse])
+async def get_upcoming_birthdays(days: int = Query(config.BIRTHDAY_WINDOW_DAYS, ge=0, le=366),
+                                 db: AsyncSession = Depends(get_read_db),
+                                 user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Retrieve contacts with a birthday in the next days.
+
+    :param days: Length of the window in days (between 0 and 366), today included.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Current authenticated user.
+    :return: List of ContactResponse objects ordered by their next birthday.
+    """
+    contacts = await repository_contacts.get_contacts_upcoming_birthdays(db, user, days)
+    return json_response(contacts, List[ContactResponse])
+
+
+@router.get("/search", response_model=List[ContactResponse])
+async def search_contacts(response: Response, q: str = Query(min_length=1, max_length=100),
+                          limit: int = Query(10, ge=1, le=100), after: tuple[float, int] | None = Depends(ranked_cursor),
+                          db: AsyncSession = Depends(get_read_db),
+                          user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Search contacts by name, lastname, email or phone.
+
+    Each word of ``q`` matches as a prefix; results come best match first. Pass the ``X-Next-Cursor``
+    header of a page as ``after`` to fetch the next one.
+
+    :param response: Response used to return the cursor of the next page.
+    :param q: The search query.
+    :param limit: Maximum number of contacts to retrieve (between 1 and 100).
+    :param after: Cursor of the previous page.
     :param db: AsyncSession instance for database interaction.
+    :param user: Current authenticated user.
     :return: List of ContactResponse objects.
     """
-    contacts = await repository_contacts.get_all_contacts(limit, offset, db)
-    return contacts
+    contacts = await repository_contacts.search_contacts(q, limit, db, user, after)
+    set_next_cursor(response, contacts, limit, key=lambda contact: (contact.score, contact.id))
+    return json_response(contacts, List[ContactResponse], response)
+
+
+@router.get("/autocomplete", response_model=List[ContactSuggestion])
+async def autocomplete_contacts(q: str = Query(min_length=1, max_length=100), limit: int = Query(10, ge=1, le=20),
+                                user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Suggest contacts whose name, lastname or email starts with what the user typed.
+
+    Served from the autocomplete index without touching the database.
+
+    :param q: The typed prefix.
+    :param limit: Maximum number of suggestions (between 1 and 20).
+    :param user: Current authenticated user.
+    :return: List of ContactSuggestion objects.
+    """
+    return await autocomplete.complete(user.id, q, limit)
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
-async def get_contact(contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
-                      user: User = Depends(auth_service.get_current_user)):
+async def get_contact(response: Response, contact_id: int = Path(ge=1),
+                      cache: CachedResponse = Depends(cached_response), db: AsyncSession = Depends(get_read_db),
+                      user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve a specific contact by ID.
 
+    :param response: Response whose headers are cached with the body.
     :param contact_id: ID of the contact to retrieve (must be greater than or equal to 1).
+    :param cache: Cached response of the request.
     :param db: AsyncSession instance for database interaction.
     :param user: Current authenticated user.
     :return: ContactResponse object.
     """
+    if cache.hit:
+        return cache.response()
     contact = await repository_contacts.get_contact(contact_id, db, user)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="NOT FOUND")
-    return contact
+    return await cache.render(contact, ContactResponse, response)
 
 
 @router.post("/", response_model=ContactResponse, status_code=status.HTTP_201_CREATED)
 async def create_contact(body: ContactBase, db: AsyncSession = Depends(get_db),
-                         user: User = Depends(auth_service.get_current_user)):
+                         user: Principal = Depends(auth_service.get_current_user)):
     """
     Create a new contact.
 
@@ -75,9 +183,45 @@ async def create_contact(body: ContactBase, db: AsyncSession = Depends(get_db),
     return contact
 
 
+@router.post("/import", response_model=ContactImportResult)
+async def import_contacts(body: List[Any] = Body(...), db: AsyncSession = Depends(get_db),
+                          user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Import many contacts from a JSON array.
+
+    Items are validated and inserted in chunks; invalid items and duplicate emails are reported by
+    their index in the array without rejecting the others.
+
+    :param body: The contacts to import.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Current authenticated user.
+    :return: ContactImportResult with the created IDs and the per-item errors.
+    """
+    return await repository_contacts.import_contacts(body, db, user, config.CONTACT_IMPORT_CHUNK_SIZE)
+
+
+@router.post("/import/csv", response_model=ContactImportResult)
+async def import_contacts_csv(file: UploadFile, db: AsyncSession = Depends(get_db),
+                              user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Import many contacts from an uploaded CSV file.
+
+    The file needs a header line with the contact fields and is read row by row, so only one chunk
+    is held in memory at a time. Errors are reported by the index of the data row, starting at 0.
+
+    :param file: CSV file with name, lastname, email, phone, address and birthday columns.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Current authenticated user.
+    :return: ContactImportResult with the created IDs and the per-row errors.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file.file, encoding="utf-8-sig", newline=""))
+    rows = ({key: value or None for key, value in row.items()} for row in reader)
+    return await repository_contacts.import_contacts(rows, db, user, config.CONTACT_IMPORT_CHUNK_SIZE)
+
+
 @router.put("/{contact_id}", response_model=ContactResponse)
 async def update_contact(body: ContactUpdate, contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
-                         user: User = Depends(auth_service.get_current_user)):
+                         user: Principal = Depends(auth_service.get_current_user)):
     """
     Update an existing contact by ID.
 
@@ -95,7 +239,7 @@ async def update_contact(body: ContactUpdate, contact_id: int = Path(ge=1), db:
 
 @router.delete("/{contact_id}", response_model=ContactResponse)
 async def delete_contact(contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
-                         user: User = Depends(auth_service.get_current_user)):
+                         user: Principal = Depends(auth_service.get_current_user)):
     """
     Delete a contact by ID.
 
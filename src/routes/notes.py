@@ -1,53 +1,68 @@
-from typing import List
+from typing import Any, List, Union
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Response, Body
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.entity.models import User
-from src.schemas.schemas import NoteModel, NoteUpdate, NoteStatusUpdate, NoteResponse
+from src.services.sessions import get_db, get_read_db
+from src.entity.principal import Principal
+from src.schemas.schemas import (NoteModel, NoteUpdate, NoteStatusUpdate, NoteResponse, NoteBatchUpdate,
+                                 NoteBatchResult)
 from src.repository import notes as repository_notes
+from src.conf.config import config
 from src.services.auth import auth_service
+from src.services.http_cache import CachedResponse, cached_response
+from src.services.pagination import after_cursor, set_next_cursor
 
 router = APIRouter(prefix='/notes', tags=["notes"])
 
 
 @router.get("/", response_model=List[NoteResponse])
-async def read_notes(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db),
-                     user: User = Depends(auth_service.get_current_user)):
+async def read_notes(response: Response, skip: int = 0, limit: int = 100,
+                     after: int | None = Depends(after_cursor), cache: CachedResponse = Depends(cached_response),
+                     db: AsyncSession = Depends(get_read_db), user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve a list of notes.
 
-    :param skip: Number of notes to skip.
+    :param response: Response used to return the cursor of the next page.
+    :param skip: Number of notes to skip; ignored when ``after`` is given.
     :param limit: Maximum number of notes to retrieve.
+    :param after: Cursor of the previous page.
+    :param cache: Cached response of the request.
     :param db: AsyncSession instance for database interaction.
     :param user: Current authenticated user.
     :return: List of NoteResponse objects.
     """
-    notes = await repository_notes.get_notes(skip, limit, db)
-    return notes
+    if cache.hit:
+        return cache.response()
+    notes = await repository_notes.get_notes(skip, limit, db, user, after)
+    set_next_cursor(response, notes, limit)
+    return await cache.render(notes, List[NoteResponse], response)
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
-async def read_note(note_id: int, db: AsyncSession = Depends(get_db),
-                    user: User = Depends(auth_service.get_current_user)):
+async def read_note(response: Response, note_id: int, cache: CachedResponse = Depends(cached_response),
+                    db: AsyncSession = Depends(get_read_db), user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve a specific note by ID.
 
+    :param response: Response whose headers are cached with the body.
     :param note_id: ID of the note to retrieve.
+    :param cache: Cached response of the request.
     :param db: AsyncSession instance for database interaction.
     :param user: Current authenticated user.
     :return: NoteResponse object.
     """
-    note = await repository_notes.get_note(note_id, db)
+    if cache.hit:
+        return cache.response()
+    note = await repository_notes.get_note(note_id, db, user)
     if note is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
-    return note
+    return await cache.render(note, NoteResponse, response)
 
 
 @router.post("/", response_model=NoteResponse)
 async def create_note(body: NoteModel, db: AsyncSession = Depends(get_db),
-                      user: User = Depends(auth_service.get_current_user)):
+                      user: Principal = Depends(auth_service.get_current_user)):
     """
     Create a new note.
 
@@ -56,12 +71,46 @@ async def create_note(body: NoteModel, db: AsyncSession = Depends(get_db),
     :param user: Current authenticated user.
     :return: Newly created NoteResponse object.
     """
-    return await repository_notes.create_note(body, db)
+    return await repository_notes.create_note(body, db, user)
+
+
+@router.post("/batch", response_model=NoteBatchResult)
+async def create_notes(body: List[Union[NoteModel, Any]] = Body(..., max_length=config.NOTE_BATCH_MAX_SIZE),
+                       db: AsyncSession = Depends(get_db), user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Create many notes in one transaction.
+
+    Items are documented as NoteModel, but invalid ones are passed through as they are and reported by
+    their index in the array without rejecting the others.
+
+    :param body: The notes to create.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Current authenticated user.
+    :return: NoteBatchResult with the created IDs and the per-item errors.
+    """
+    return await repository_notes.create_notes(body, db, user)
+
+
+@router.patch("/batch", response_model=NoteBatchResult)
+async def update_notes(body: List[Union[NoteBatchUpdate, Any]] = Body(..., max_length=config.NOTE_BATCH_MAX_SIZE),
+                       db: AsyncSession = Depends(get_db), user: Principal = Depends(auth_service.get_current_user)):
+    """
+    Partially update many notes in one transaction, e.g. to mark them done.
+
+    Each item is a NoteBatchUpdate: the ``id`` of a note and the fields to change. Invalid items and
+    unknown notes are reported by their index in the array without rejecting the others.
+
+    :param body: The changes to apply.
+    :param db: AsyncSession instance for database interaction.
+    :param user: Current authenticated user.
+    :return: NoteBatchResult with the updated IDs and the per-item errors.
+    """
+    return await repository_notes.update_notes(body, db, user)
 
 
 @router.put("/{note_id}", response_model=NoteResponse)
 async def update_note(body: NoteUpdate, note_id: int, db: AsyncSession = Depends(get_db),
-                      user: User = Depends(auth_service.get_current_user)):
+                      user: Principal = Depends(auth_service.get_current_user)):
     """
     Update an existing note by ID.
 
@@ -71,7 +120,7 @@ async def update_note(body: NoteUpdate, note_id: int, db: AsyncSession = Depends
     :param user: Current authenticated user.
     :return: Updated NoteResponse object.
     """
-    note = await repository_notes.update_note(note_id, body, db)
+    note = await repository_notes.update_note(note_id, body, db, user)
     if note is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
     return note
@@ -79,7 +128,7 @@ async def update_note(body: NoteUpdate, note_id: int, db: AsyncSession = Depends
 
 @router.patch("/{note_id}", response_model=NoteResponse)
 async def update_status_note(body: NoteStatusUpdate, note_id: int, db: AsyncSession = Depends(get_db),
-                             user: User = Depends(auth_service.get_current_user)):
+                             user: Principal = Depends(auth_service.get_current_user)):
     """
     Update the status of a note by ID.
 
@@ -89,7 +138,7 @@ async def update_status_note(body: NoteStatusUpdate, note_id: int, db: AsyncSess
     :param user: Current authenticated user.
     :return: Updated NoteResponse object.
     """
-    note = await repository_notes.update_status_note(note_id, body, db)
+    note = await repository_notes.update_status_note(note_id, body, db, user)
     if note is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
     return note
@@ -97,7 +146,7 @@ async def update_status_note(body: NoteStatusUpdate, note_id: int, db: AsyncSess
 
 @router.delete("/{note_id}", response_model=NoteResponse)
 async def remove_note(note_id: int, db: AsyncSession = Depends(get_db),
-                      user: User = Depends(auth_service.get_current_user)):
+                      user: Principal = Depends(auth_service.get_current_user)):
     """
     Delete a note by ID.
 
@@ -106,7 +155,7 @@ async def remove_note(note_id: int, db: AsyncSession = Depends(get_db),
     :param user: Current authenticated user.
     :return: Deleted NoteResponse object.
     """
-    note = await repository_notes.remove_note(note_id, db)
+    note = await repository_notes.remove_note(note_id, db, user)
     if note is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
     return note
@@ -1,54 +1,67 @@
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, status, Query, Path
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Path, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.database.db import get_db
-from src.entity.models import User
+from src.services.sessions import get_db, get_read_db
+from src.entity.principal import Principal
 from src.schemas.schemas import TagModel, TagResponse
 from src.repository import tags as repository_tags
 from src.services.auth import auth_service
+from src.services.http_cache import CachedResponse, cached_response
+from src.services.pagination import after_cursor, set_next_cursor
 
 router = APIRouter(prefix='/tags', tags=["tags"])
 
 
 @router.get("/", response_model=List[TagResponse])
-async def read_tags(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db),
-                    user: User = Depends(auth_service.get_current_user)):
+async def read_tags(response: Response, skip: int = 0, limit: int = 100,
+                    after: int | None = Depends(after_cursor), cache: CachedResponse = Depends(cached_response),
+                    db: AsyncSession = Depends(get_read_db), user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve a list of tags.
 
-    :param skip: Number of tags to skip.
+    :param response: Response used to return the cursor of the next page.
+    :param skip: Number of tags to skip; ignored when ``after`` is given.
     :param limit: Maximum number of tags to retrieve.
+    :param after: Cursor of the previous page.
+    :param cache: Cached response of the request.
     :param db: AsyncSession instance for database interaction.
     :param user: Current authenticated user.
     :return: List of TagResponse objects.
     """
-    tags = await repository_tags.get_tags(skip, limit, db)
-    return tags
+    if cache.hit:
+        return cache.response()
+    tags = await repository_tags.get_tags(skip, limit, db, user, after)
+    set_next_cursor(response, tags, limit)
+    return await cache.render(tags, List[TagResponse], response)
 
 
 @router.get("/{tag_id}", response_model=TagResponse)
-async def read_tag(tag_id: int, db: AsyncSession = Depends(get_db),
-                   user: User = Depends(auth_service.get_current_user)):
+async def read_tag(response: Response, tag_id: int, cache: CachedResponse = Depends(cached_response),
+                   db: AsyncSession = Depends(get_read_db), user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve a specific tag by ID.
 
+    :param response: Response whose headers are cached with the body.
     :param tag_id: ID of the tag to retrieve.
+    :param cache: Cached response of the request.
     :param db: AsyncSession instance for database interaction.
     :param user: Current authenticated user.
     :return: TagResponse object.
     """
-    tag = await repository_tags.get_tag(tag_id, db)
+    if cache.hit:
+        return cache.response()
+    tag = await repository_tags.get_tag(tag_id, db, user)
     if tag is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
-    return tag
+    return await cache.render(tag, TagResponse, response)
 
 
 @router.post("/", response_model=TagResponse)
 async def create_tag(body: TagModel, db: AsyncSession = Depends(get_db),
-                     user: User = Depends(auth_service.get_current_user)):
+                     user: Principal = Depends(auth_service.get_current_user)):
     """
     Create a new tag.
 
@@ -57,12 +70,12 @@ async def create_tag(body: TagModel, db: AsyncSession = Depends(get_db),
     :param user: Current authenticated user.
     :return: Newly created TagResponse object.
     """
-    return await repository_tags.create_tag(body, db)
+    return await repository_tags.create_tag(body, db, user)
 
 
 @router.put("/{tag_id}", response_model=TagResponse)
 async def update_tag(body: TagModel, tag_id: int, db: AsyncSession = Depends(get_db),
-                     user: User = Depends(auth_service.get_current_user)):
+                     user: Principal = Depends(auth_service.get_current_user)):
     """
     Update an existing tag by ID.
 
@@ -72,7 +85,7 @@ async def update_tag(body: TagModel, tag_id: int, db: AsyncSession = Depends(get
     :param user: Current authenticated user.
     :return: Updated TagResponse object.
     """
-    tag = await repository_tags.update_tag(tag_id, body, db)
+    tag = await repository_tags.update_tag(tag_id, body, db, user)
     if tag is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
     return tag
@@ -80,7 +93,7 @@ async def update_tag(body: TagModel, tag_id: int, db: AsyncSession = Depends(get
 
 @router.delete("/{tag_id}", response_model=TagResponse)
 async def remove_tag(tag_id: int, db: AsyncSession = Depends(get_db),
-                     user: User = Depends(auth_service.get_current_user)):
+                     user: Principal = Depends(auth_service.get_current_user)):
     """
     Delete a tag by ID.
 
@@ -89,7 +102,7 @@ async def remove_tag(tag_id: int, db: AsyncSession = Depends(get_db),
     :param user: Current authenticated user.
     :return: Deleted TagResponse object.
     """
-    tag = await repository_tags.remove_tag(tag_id, db)
+    tag = await repository_tags.remove_tag(tag_id, db, user)
     if tag is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tag not found")
     return tag
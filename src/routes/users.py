@@ -5,8 +5,8 @@ from fastapi import APIRouter, Depends, UploadFile
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.entity.models import User
+from src.services.sessions import get_db
+from src.entity.principal import Principal
 
 from src.schemas.user import UserResponse
 from src.services.auth import auth_service
@@ -18,7 +18,7 @@ cloudinary.config(cloud_name=config.CLD_NAME, api_key=config.CLD_API_KEY, api_se
 
 
 @router.get("/me", response_model=UserResponse, dependencies=[Depends(RateLimiter(times=1, seconds=20))])
-async def get_current_user(user: User = Depends(auth_service.get_current_user)):
+async def get_current_user(user: Principal = Depends(auth_service.get_current_user)):
     """
     Retrieve the currently authenticated user.
 
@@ -31,7 +31,7 @@ async def get_current_user(user: User = Depends(auth_service.get_current_user)):
 
 
 @router.patch("/avatar", response_model=UserResponse, dependencies=[Depends(RateLimiter(times=1, seconds=20))])
-async def get_current_user(file: UploadFile, user: User = Depends(auth_service.get_current_user),
+async def get_current_user(file: UploadFile, user: Principal = Depends(auth_service.get_current_user),
                            db: AsyncSession = Depends(get_db)):
     """
     Update the avatar of the authenticated user.
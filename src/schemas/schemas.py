@@ -40,6 +40,25 @@ class NoteResponse(BaseModel):
         from_attributes = True
 
 
+class NoteBatchUpdate(BaseModel):
+    id: int
+    title: Optional[str] = Field(None, max_length=50)
+    description: Optional[str] = Field(None, max_length=150)
+    done: Optional[bool] = None
+    tags: Optional[List[int]] = None
+
+
+class NoteBatchError(BaseModel):
+    index: int
+    id: Optional[int] = None
+    detail: str
+
+
+class NoteBatchResult(BaseModel):
+    ids: List[int] = []
+    errors: List[NoteBatchError] = []
+
+
 class ContactBase(BaseModel):
     name: str = Field(min_length=3, max_length=25)
     lastname: str = Field(min_length=3, max_length=25)
@@ -61,3 +80,19 @@ class ContactResponse(ContactBase):
     id: int
     model_config = ConfigDict(from_attributes = True)  # noqa
 
+
+class ContactSuggestion(BaseModel):
+    id: int
+    label: str
+
+
+class ContactImportError(BaseModel):
+    index: int
+    email: Optional[str] = None
+    detail: str
+
+
+class ContactImportResult(BaseModel):
+    created: int = 0
+    ids: List[int] = []
+    errors: List[ContactImportError] = []
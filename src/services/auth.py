@@ -1,26 +1,23 @@
-import pickle
 from datetime import datetime, timedelta
 from typing import Optional
-import redis
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 
 from src.conf.config import config
-from src.database.db import get_db
+from src.services.sessions import get_read_db
+from src.entity.principal import Principal
 from src.repository import users as repository_users
+from src.services.cache import user_cache
+from src.services.password import password_hasher
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = password_hasher.context
     SECRET_KEY = config.KEY_JWT
     ALGORITHM = config.ALG
-    cache = redis.Redis(host=config.REDIS_DOMAIN,
-                        port=config.REDIS_PORT,
-                        db=0,
-                        password=config.REDIS_PASSWORD)
+    cache = user_cache
 
     def verify_password(self, plain_password, hashed_password):
         return self.pwd_context.verify(plain_password, hashed_password)
@@ -62,7 +59,8 @@ class Auth:
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
 
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+    async def get_current_user(self, token: str = Depends(oauth2_scheme),
+                               db: AsyncSession = Depends(get_read_db)) -> Principal:
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -81,19 +79,17 @@ class Auth:
         except JWTError as e:
             raise credentials_exception
 
-        user_hash = str(email)
-        user = self.cache.get(user_hash)
+        user = await self.cache.get(email)
 
         if user is None:
             print("User from DB")
             user = await repository_users.get_user_by_email(email, db)
             if user is None:
                 raise credentials_exception
-            self.cache.set(user_hash, pickle.dumps(user))
-            self.cache.expire(user_hash, 600)
+            user = Principal.from_user(user)
+            await self.cache.set(email, user)
         else:
             print("User from cache")
-            user = pickle.loads(user)
         return user
 
     def create_email_token(self, data: dict):
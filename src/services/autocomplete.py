@@ -0,0 +1,224 @@
+import asyncio
+import json
+from bisect import bisect_left, insort
+from itertools import groupby
+from typing import Any, Iterable
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+
+from src.conf.config import config
+from src.entity.models import Contact
+from src.services.cache import redis_client
+
+
+def contact_terms(contact: Any) -> list[str]:
+    """
+    List the strings a contact can be found by while typing: its name, lastname, full name and email.
+
+    :param contact: An object with the ``name``, ``lastname`` and ``email`` of a contact.
+    :return: The lowercased terms.
+    """
+    terms = {contact.name, contact.lastname, f"{contact.name} {contact.lastname}", contact.email}
+    return sorted(term.lower() for term in terms if term)
+
+
+def contact_label(contact: Any) -> str:
+    return f"{contact.name} {contact.lastname} <{contact.email}>"
+
+
+def _unique(entries: Iterable[tuple[int, str]], limit: int) -> list[dict]:
+    suggestions = {}
+    for contact_id, label in entries:
+        suggestions.setdefault(contact_id, {"id": contact_id, "label": label})
+        if len(suggestions) == limit:
+            break
+    return list(suggestions.values())
+
+
+class RedisAutocomplete:
+    """
+    Per-user prefix index of contacts kept in Redis.
+
+    Each user has a sorted set whose members all score 0, so ZRANGEBYLEX walks them in lexical order:
+    a lookup costs one round trip and O(log n + limit) in Redis. Members are ``term\\0id\\0label``,
+    and a hash remembers the members of each contact so they can be replaced or removed.
+    Errors are printed rather than raised: a stale index only degrades suggestions and the rebuild
+    command restores it.
+    """
+
+    def __init__(self, client: redis.Redis, prefix: str = "autocomplete:"):
+        self.client = client
+        self.prefix = prefix
+
+    def _keys(self, user_id: int) -> tuple[str, str]:
+        return f"{self.prefix}{user_id}", f"{self.prefix}{user_id}:members"
+
+    async def add(self, user_id: int, contacts: Iterable[Any]) -> None:
+        """
+        Index contacts of a user, replacing their previous entries.
+
+        :param user_id: The ID of the owner.
+        :param contacts: Objects with the ``id``, ``name``, ``lastname`` and ``email`` of the contacts.
+        """
+        members = {contact.id: [f"{term}\0{contact.id}\0{contact_label(contact)}" for term in contact_terms(contact)]
+                   for contact in contacts}
+        if members:
+            await self._replace(user_id, list(members), members)
+
+    async def remove(self, user_id: int, *contact_ids: int) -> None:
+        """
+        Drop contacts of a user from the index.
+
+        :param user_id: The ID of the owner.
+        :param contact_ids: The IDs of the contacts.
+        """
+        if contact_ids:
+            await self._replace(user_id, list(contact_ids), {})
+
+    async def _replace(self, user_id: int, contact_ids: list[int], members: dict[int, list[str]]) -> None:
+        # The members hash is watched, so a concurrent change to it between reading the previous entries
+        # and replacing them makes the transaction fail and start over instead of leaving orphans.
+        key, members_key = self._keys(user_id)
+
+        async def replace(pipe):
+            previous = await pipe.hmget(members_key, contact_ids)
+            pipe.multi()
+            for raw in previous:
+                if raw:
+                    pipe.zrem(key, *json.loads(raw))
+            if members:
+                pipe.zadd(key, {member: 0 for entries in members.values() for member in entries})
+                pipe.hset(members_key, mapping={contact_id: json.dumps(entries)
+                                                for contact_id, entries in members.items()})
+            else:
+                pipe.hdel(members_key, *contact_ids)
+
+        try:
+            await self.client.transaction(replace, members_key)
+        except RedisError as err:
+            print(err)
+
+    async def complete(self, user_id: int, prefix: str, limit: int = 10) -> list[dict]:
+        """
+        Suggest contacts of a user whose name, lastname or email starts with a prefix.
+
+        :param user_id: The ID of the owner.
+        :param prefix: What the user typed so far.
+        :param limit: The maximum number of suggestions.
+        :return: Up to ``limit`` dicts with the ``id`` and ``label`` of a contact.
+        """
+        start = prefix.lower().encode()
+        key, _ = self._keys(user_id)
+        try:
+            # A contact has up to four terms, so this many members always hold ``limit`` distinct contacts.
+            raw = await self.client.zrangebylex(key, b"[" + start, b"[" + start + b"\xff", start=0, num=4 * limit)
+        except RedisError as err:
+            print(err)
+            return []
+        entries = (member.decode().split("\0") for member in raw)
+        return _unique(((int(contact_id), label) for _, contact_id, label in entries), limit)
+
+    async def clear(self) -> None:
+        """
+        Drop the index of every user.
+        """
+        async for key in self.client.scan_iter(match=f"{self.prefix}*", count=1000):
+            await self.client.unlink(key)
+
+
+class MemoryAutocomplete:
+    """
+    Per-user prefix index of contacts kept in process, for single-process deployments and tests.
+
+    Each user has a sorted list of ``(term, id, label)`` entries searched with bisection.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, list[tuple[str, int, str]]] = {}
+        self._members: dict[tuple[int, int], list[tuple[str, int, str]]] = {}
+
+    async def add(self, user_id: int, contacts: Iterable[Any]) -> None:
+        """
+        Index contacts of a user, replacing their previous entries.
+
+        :param user_id: The ID of the owner.
+        :param contacts: Objects with the ``id``, ``name``, ``lastname`` and ``email`` of the contacts.
+        """
+        contacts = list(contacts)
+        await self.remove(user_id, *(contact.id for contact in contacts))
+        entries = self._entries.setdefault(user_id, [])
+        for contact in contacts:
+            members = [(term, contact.id, contact_label(contact)) for term in contact_terms(contact)]
+            for member in members:
+                insort(entries, member)
+            self._members[user_id, contact.id] = members
+
+    async def remove(self, user_id: int, *contact_ids: int) -> None:
+        """
+        Drop contacts of a user from the index.
+
+        :param user_id: The ID of the owner.
+        :param contact_ids: The IDs of the contacts.
+        """
+        entries = self._entries.get(user_id, [])
+        for contact_id in contact_ids:
+            for member in self._members.pop((user_id, contact_id), []):
+                del entries[bisect_left(entries, member)]
+
+    async def complete(self, user_id: int, prefix: str, limit: int = 10) -> list[dict]:
+        """
+        Suggest contacts of a user whose name, lastname or email starts with a prefix.
+
+        :param user_id: The ID of the owner.
+        :param prefix: What the user typed so far.
+        :param limit: The maximum number of suggestions.
+        :return: Up to ``limit`` dicts with the ``id`` and ``label`` of a contact.
+        """
+        prefix = prefix.lower()
+        entries = self._entries.get(user_id, [])
+        index = bisect_left(entries, (prefix,))
+        matches = []
+        while index < len(entries) and entries[index][0].startswith(prefix):
+            matches.append(entries[index][1:])
+            index += 1
+        return _unique(matches, limit)
+
+    async def clear(self) -> None:
+        """
+        Drop the index of every user.
+        """
+        self._entries.clear()
+        self._members.clear()
+
+
+async def rebuild(index: RedisAutocomplete | MemoryAutocomplete, session_factory, batch_size: int = 1000) -> int:
+    """
+    Rebuild the index of every user from the contacts table.
+
+    :param index: The index to rebuild.
+    :param session_factory: Opens a database session.
+    :param batch_size: The number of contacts read and indexed at a time.
+    :return: The number of contacts indexed.
+    """
+    await index.clear()
+    indexed = 0
+    stmt = (select(Contact.id, Contact.user_id, Contact.name, Contact.lastname, Contact.email)
+            .filter(Contact.user_id.is_not(None)).order_by(Contact.user_id, Contact.id)
+            .execution_options(yield_per=batch_size))
+    async with session_factory() as db:
+        result = await db.stream(stmt)
+        async for rows in result.partitions():
+            for user_id, contacts in groupby(rows, key=lambda row: row.user_id):
+                await index.add(user_id, contacts)
+            indexed += len(rows)
+    return indexed
+
+
+autocomplete = MemoryAutocomplete() if config.AUTOCOMPLETE_BACKEND == "memory" else RedisAutocomplete(redis_client)
+
+if __name__ == "__main__":
+    from src.database.db import sessionmanager
+
+    print(f"Indexed {asyncio.run(rebuild(autocomplete, sessionmanager.session))} contacts")
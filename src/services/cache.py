@@ -0,0 +1,284 @@
+import asyncio
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.conf.config import config
+from src.entity.models import Tag
+from src.entity.principal import Principal
+
+redis_pool = redis.ConnectionPool(host=config.REDIS_DOMAIN,
+                                  port=config.REDIS_PORT,
+                                  db=0,
+                                  password=config.REDIS_PASSWORD,
+                                  max_connections=config.REDIS_MAX_CONNECTIONS)
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+
+class LRUCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a per-entry time to live.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        """
+        Read an entry, dropping it if it has expired.
+
+        :param key: The key of the entry.
+        :return: The cached value, or None if it is missing or expired.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store an entry, evicting the least recently used ones above ``maxsize``.
+
+        :param key: The key of the entry.
+        :param value: The value to cache.
+        """
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        """
+        Drop an entry if present.
+
+        :param key: The key of the entry.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class UserCache:
+    """
+    Two-tier cache of authenticated users: an in-process LRU in front of Redis.
+
+    Redis commands go through the shared ``redis_pool`` so the cache never blocks the event loop
+    and reuses the same connections as the rate limiter. Every worker keeps its own local tier and
+    evicts from it when a change is published on ``channel``.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int, local: LRUCache | None = None, serializer=pickle,
+                 prefix: str = "user:", channel: str = "user-cache:invalidate"):
+        self.client = client
+        self.ttl = ttl
+        self.local = local
+        self.serializer = serializer
+        self.prefix = prefix
+        self.channel = channel
+
+    def _key(self, email: str) -> str:
+        return f"{self.prefix}{email}"
+
+    async def get(self, email: str) -> Any | None:
+        """
+        Read a cached user, trying the local tier before Redis.
+
+        A Redis error is reported and treated as a miss, so callers fall back to the database.
+
+        :param email: The email address of the user.
+        :return: The cached user, or None on a cache miss.
+        """
+        if self.local is not None:
+            user = self.local.get(email)
+            if user is not None:
+                return user
+        try:
+            value = await self.client.get(self._key(email))
+        except RedisError as err:
+            print(err)
+            return None
+        if value is None:
+            return None
+        user = self.serializer.loads(value)
+        if user is None:
+            return None
+        if self.local is not None:
+            self.local.set(email, user)
+        return user
+
+    async def set(self, email: str, user: Any) -> None:
+        """
+        Store a user locally and in Redis with its expiry in a single SET ... EX command.
+
+        Redis errors are reported but not raised; the user is then only cached locally.
+
+        :param email: The email address of the user.
+        :param user: The user to cache.
+        """
+        if self.local is not None:
+            self.local.set(email, user)
+        try:
+            await self.client.set(self._key(email), self.serializer.dumps(user), ex=self.ttl)
+        except RedisError as err:
+            print(err)
+
+    async def invalidate(self, *emails: str) -> None:
+        """
+        Drop cached users everywhere, pipelining the deletes and notifications into one round trip.
+
+        Redis errors are reported but not raised, so a cache outage never fails the write that
+        triggered the invalidation; the entries then expire on their own TTL.
+
+        :param emails: The email addresses of the users to drop.
+        """
+        if self.local is not None:
+            for email in emails:
+                self.local.pop(email)
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for email in emails:
+                    pipe.delete(self._key(email))
+                    pipe.publish(self.channel, email)
+                await pipe.execute()
+        except RedisError as err:
+            print(err)
+
+    async def listen(self, retry_delay: float = 1.0) -> None:
+        """
+        Evict local entries on invalidation messages published by any worker.
+
+        Runs until cancelled. The local tier is cleared whenever the subscription is
+        (re)established, because messages published while disconnected are lost.
+
+        :param retry_delay: Seconds to wait before resubscribing after a Redis error.
+        """
+        if self.local is None:
+            return
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    self.local.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.local.pop(message["data"].decode())
+            except RedisError as err:
+                print(err)
+                await asyncio.sleep(retry_delay)
+
+
+class TagCache:
+    """
+    Names of tags kept in Redis, one hash per user mapping tag IDs to names.
+
+    Note writes resolve their tag IDs with one HMGET instead of a SELECT, and only query the database
+    for the IDs that are not cached yet. Tag writes update the hash directly. A user's hash expires
+    ``ttl`` seconds after it is created, whatever is filled in later, which bounds how long a tag stays
+    stale or a deleted tag stays cached if a concurrent fill races a write. Errors are printed rather
+    than raised, so lookups fall back to the database.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int, prefix: str = "tags:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}{user_id}"
+
+    async def get_many(self, user_id: int, tag_ids: list[int]) -> dict[int, str]:
+        """
+        Read the cached names of tags of a user.
+
+        :param user_id: The ID of the owner.
+        :param tag_ids: The IDs of the tags.
+        :return: The names of the cached tags by ID; missing tags are not cached or do not exist.
+        """
+        if not tag_ids:
+            return {}
+        try:
+            names = await self.client.hmget(self._key(user_id), tag_ids)
+        except RedisError as err:
+            print(err)
+            return {}
+        return {tag_id: name.decode() for tag_id, name in zip(tag_ids, names) if name is not None}
+
+    async def set_many(self, tags: dict[int, dict[int, str]]) -> None:
+        """
+        Cache the names of tags, pipelining every user into one round trip.
+
+        :param tags: The names of the tags by ID, grouped by the ID of their owner.
+        """
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for user_id, names in tags.items():
+                    pipe.hset(self._key(user_id), mapping=names)
+                    pipe.expire(self._key(user_id), self.ttl, nx=True)
+                await pipe.execute()
+        except RedisError as err:
+            print(err)
+
+    async def delete(self, user_id: int, *tag_ids: int) -> None:
+        """
+        Drop tags of a user from the cache.
+
+        :param user_id: The ID of the owner.
+        :param tag_ids: The IDs of the tags.
+        """
+        try:
+            await self.client.hdel(self._key(user_id), *tag_ids)
+        except RedisError as err:
+            print(err)
+
+    async def warm(self, session_factory, batch_size: int = 1000) -> int:
+        """
+        Load the tags of every user from the database.
+
+        Only the first process to start within ``ttl`` seconds scans the table; the others find the
+        cache already warm. Errors are printed rather than raised, so the application still starts and
+        the cache fills on demand.
+
+        :param session_factory: Opens a database session.
+        :param batch_size: The number of tags read and cached at a time.
+        :return: The number of tags read.
+        """
+        loaded = 0
+        stmt = (select(Tag.id, Tag.user_id, Tag.name).filter(Tag.user_id.is_not(None))
+                .execution_options(yield_per=batch_size))
+        try:
+            if not await self.client.set(f"{self.prefix}warm", 1, nx=True, ex=self.ttl):
+                return loaded
+            async with session_factory() as db:
+                result = await db.stream(stmt)
+                async for rows in result.partitions():
+                    tags: dict[int, dict[int, str]] = {}
+                    for tag_id, user_id, name in rows:
+                        tags.setdefault(user_id, {})[tag_id] = name
+                    await self.set_many(tags)
+                    loaded += len(rows)
+        except (RedisError, SQLAlchemyError, OSError) as err:
+            print(err)
+        return loaded
+
+
+user_cache = UserCache(redis_client, config.USER_CACHE_TTL,
+                       local=LRUCache(config.USER_CACHE_LOCAL_SIZE, config.USER_CACHE_LOCAL_TTL),
+                       serializer=Principal)
+tag_cache = TagCache(redis_client, config.TAG_CACHE_TTL)
@@ -1,38 +1,57 @@
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from pydantic import EmailStr
+from redis.exceptions import RedisError
 
 from src.services.auth import auth_service
+from src.services.cache import redis_client
+from src.services.queue import JobQueue
+from src.services.smtp import smtp_pool
 from src.conf.config import config
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=config.MAIL_USERNAME,
-    MAIL_PASSWORD=config.MAIL_PASSWORD,
-    MAIL_FROM=config.MAIL_USERNAME,
-    MAIL_PORT=config.MAIL_PORT,
-    MAIL_SERVER=config.MAIL_SERVER,
-    MAIL_FROM_NAME="TODO Systems",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
-)
+templates = Environment(loader=FileSystemLoader(Path(__file__).parent / 'templates'), autoescape=select_autoescape())
 
+email_queue = JobQueue(redis_client, "queue:email", max_attempts=config.EMAIL_QUEUE_MAX_ATTEMPTS)
 
+
+@email_queue.task("send_email")
 async def send_email(email: EmailStr, username: str, host: str):
+    """
+    Send the email address verification message.
+
+    Runs in the queue worker; errors propagate so the job is retried.
+
+    :param email: The address to verify.
+    :param username: The name of the user.
+    :param host: The base URL of the API, used in the verification link.
+    """
+    token_verification = auth_service.create_email_token({"sub": email})
+    message = EmailMessage()
+    message["Subject"] = "Confirm your email "
+    message["From"] = formataddr(("TODO Systems", config.MAIL_USERNAME))
+    message["To"] = email
+    body = templates.get_template("verify_email.html").render(host=host, username=username, token=token_verification)
+    message.set_content(body, subtype="html")
+    await smtp_pool.send(message)
+
+
+async def enqueue_email(email: EmailStr, username: str, host: str) -> str | None:
+    """
+    Queue the email address verification message for the worker.
+
+    Redis errors are printed rather than raised: the user is already saved when this runs, and can ask
+    for the message again through ``/auth/request_email``.
+
+    :param email: The address to verify.
+    :param username: The name of the user.
+    :param host: The base URL of the API, used in the verification link.
+    :return: The ID of the job, or None if it could not be queued.
+    """
     try:
-        token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="verify_email.html")
-    except ConnectionErrors as err:
-        print(err)
\ No newline at end of file
+        return await email_queue.enqueue("send_email", email=email, username=username, host=host)
+    except RedisError as err:
+        print(err)
+        return None
@@ -0,0 +1,49 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Row
+
+CONTACT_FIELDS = ("id", "name", "lastname", "email", "phone", "address", "birthday")
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def ndjson_chunks(batches: AsyncIterator[Sequence[Row]], fields: Sequence[str] = CONTACT_FIELDS) \
+        -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows as newline-delimited JSON, one chunk per batch.
+
+    :param batches: Batches of rows whose columns are ``fields``.
+    :param fields: The names of the columns.
+    :return: An async iterator over encoded chunks.
+    """
+    async for rows in batches:
+        yield "".join(json.dumps(dict(zip(fields, row)), default=_default) + "\n" for row in rows).encode()
+
+
+async def csv_chunks(batches: AsyncIterator[Sequence[Row]], fields: Sequence[str] = CONTACT_FIELDS) \
+        -> AsyncIterator[bytes]:
+    """
+    Encode batches of rows as CSV with a header line, one chunk per batch.
+
+    :param batches: Batches of rows whose columns are ``fields``.
+    :param fields: The names of the columns.
+    :return: An async iterator over encoded chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import time
+from typing import Any
+from urllib.parse import urlencode
+from uuid import uuid4
+
+import redis.asyncio as redis
+from fastapi import Depends, Request, Response
+from redis.exceptions import RedisError
+
+from src.conf.config import config
+from src.entity.principal import Principal
+from src.services.auth import auth_service
+from src.services.cache import redis_client
+from src.services.serialization import dump_json
+from src.services.sessions import reads_primary
+
+# Clients may keep a copy but must revalidate it with If-None-Match before every use.
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` header against an entity tag, with the weak comparison of RFC 9110.
+
+    :param if_none_match: The value of the header, if any.
+    :param etag: The current entity tag of the resource.
+    :return: True if the client already holds the current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class CachedResponse:
+    """
+    What the response cache knows about one GET request of a user.
+
+    Endpoints return ``response()`` on a hit; otherwise they run their query and hand the result to
+    ``render``, which serializes it, stores it for the next request and answers 304 if the client
+    already has it.
+    """
+
+    def __init__(self, cache: "ResponseCache", user_id: int, key: str, version: str | None,
+                 entry: tuple[str, dict, bytes] | None, if_none_match: str | None, available: bool = True,
+                 primary: bool = True):
+        self.cache = cache
+        self.user_id = user_id
+        self.key = key
+        self.version = version
+        self.entry = entry
+        self.if_none_match = if_none_match
+        self.available = available
+        self.primary = primary
+
+    @property
+    def hit(self) -> bool:
+        return self.entry is not None
+
+    def response(self) -> Response:
+        """
+        Build the response from the cached entry.
+
+        :return: 304 Not Modified if the client sent the current ETag, else the cached body.
+        """
+        etag, headers, body = self.entry
+        return self._response(etag, headers, body)
+
+    async def render(self, content: Any, response_model: Any, response: Response) -> Response:
+        """
+        Serialize the result of an endpoint and cache it under the version read at lookup.
+
+        :param content: What the endpoint would have returned.
+        :param response_model: The response model of the endpoint.
+        :param response: The response injected in the endpoint; its headers are kept, e.g. the next cursor.
+        :return: The response to send.
+        """
+        body = dump_json(content, response_model)
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        headers = {name: value for name, value in response.headers.items()
+                   if name not in ("content-length", "content-type")}
+        if self.available:
+            await self.cache.store(self, etag, headers, body)
+        return self._response(etag, headers, body)
+
+    def _response(self, etag: str, headers: dict, body: bytes) -> Response:
+        headers = {**headers, "ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(self.if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """
+    Cache of serialized GET responses in Redis, keyed by user, path and query parameters.
+
+    Each user has a version token that every write of their contacts, notes or tags replaces, and
+    entries are only served while they carry the current token, so one write invalidates every page of
+    the user at once. A lookup is a single MGET of the token and the entry. The token records when the
+    write happened: for ``lag`` seconds after it, bodies read from a replica may predate the write and
+    are not stored. Redis errors are printed rather than raised: requests then go to the database, and
+    entries missed by a failed invalidation expire after ``ttl`` seconds.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int, lag: int = 0, prefix: str = "http-cache:"):
+        self.client = client
+        self.ttl = ttl
+        self.lag = lag
+        self.prefix = prefix
+
+    @staticmethod
+    def _new_version(written_at: float = 0.0) -> str:
+        return f"{uuid4().hex}:{written_at:.3f}"
+
+    def _lagging(self, version: str | None) -> bool:
+        # Replicas may not have applied the last write yet while it is more recent than ``lag``.
+        _, _, written_at = (version or "").partition(":")
+        return time.time() < float(written_at or 0) + self.lag
+
+    def _version_key(self, user_id: int) -> str:
+        return f"{self.prefix}{user_id}:version"
+
+    def _entry_key(self, user_id: int, request: Request) -> str:
+        query = urlencode(sorted(request.query_params.multi_items()))
+        return f"{self.prefix}{user_id}:{request.url.path}?{query}"
+
+    async def lookup(self, request: Request, user_id: int, primary: bool = True) -> CachedResponse:
+        """
+        Read the version of a user and the cached entry of a request in one round trip.
+
+        :param request: The GET request.
+        :param user_id: The ID of the current user.
+        :param primary: Whether the endpoint reads from the primary rather than a replica.
+        :return: The CachedResponse of the request.
+        """
+        key = self._entry_key(user_id, request)
+        if_none_match = request.headers.get("if-none-match")
+        try:
+            version, raw = await self.client.mget(self._version_key(user_id), key)
+        except RedisError as err:
+            print(err)
+            return CachedResponse(self, user_id, key, None, None, if_none_match, available=False, primary=primary)
+        version = version.decode() if version is not None else None
+        entry = None
+        if version is not None and raw is not None:
+            meta, _, body = raw.partition(b"\n")
+            meta = json.loads(meta)
+            if meta["version"] == version:
+                entry = (meta["etag"], meta["headers"], body)
+        return CachedResponse(self, user_id, key, version, entry, if_none_match, primary=primary)
+
+    async def store(self, cached: CachedResponse, etag: str, headers: dict, body: bytes) -> None:
+        """
+        Cache a rendered response under the version of the user read at lookup.
+
+        A user without a version yet gets one; if another request set it first, the entry never matches.
+        Bodies read from a replica shortly after a write are skipped, so a stale page is never stored
+        under the version of that write.
+
+        :param cached: The CachedResponse of the request.
+        :param etag: The entity tag of the body.
+        :param headers: The headers to replay with the body.
+        :param body: The serialized body.
+        """
+        if not cached.primary and self._lagging(cached.version):
+            return
+        version = cached.version or self._new_version()
+        meta = json.dumps({"version": version, "etag": etag, "headers": headers}).encode()
+        try:
+            async with self.client.pipeline(transaction=True) as pipe:
+                if cached.version is None:
+                    pipe.set(self._version_key(cached.user_id), version, nx=True)
+                pipe.set(cached.key, meta + b"\n" + body, ex=self.ttl)
+                await pipe.execute()
+        except RedisError as err:
+            print(err)
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Replace the version of a user, so none of their cached responses is served again.
+
+        :param user_id: The ID of the user whose data changed.
+        """
+        try:
+            await self.client.set(self._version_key(user_id), self._new_version(time.time()))
+        except RedisError as err:
+            print(err)
+
+
+response_cache = ResponseCache(redis_client, config.HTTP_CACHE_TTL, config.DB_STICKY_SECONDS)
+
+
+async def cached_response(request: Request,
+                          user: Principal = Depends(auth_service.get_current_user)) -> CachedResponse:
+    """
+    Dependency looking up the cached response of the current GET request.
+
+    :param request: The incoming request.
+    :param user: Current authenticated user.
+    :return: The CachedResponse of the request.
+    """
+    return await response_cache.lookup(request, user.id, primary=await reads_primary(request))
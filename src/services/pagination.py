@@ -0,0 +1,83 @@
+import base64
+import binascii
+import json
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*key: Any) -> str:
+    """
+    Encode a sort key as an opaque, URL-safe cursor.
+
+    :param key: The sort key values of the last row of a page.
+    :return: The cursor.
+    """
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    :param cursor: The cursor.
+    :return: The sort key values.
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        key = None
+    if not isinstance(key, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return key
+
+
+def after_cursor(after: str | None = Query(None, description="Cursor returned in the X-Next-Cursor header")) \
+        -> int | None:
+    """
+    Dependency decoding the ``after`` query parameter of id-keyed listings.
+
+    :param after: The cursor from the previous page, if any.
+    :return: The id of the last row of the previous page, or None for the first page.
+    """
+    if after is None:
+        return None
+    key = decode_cursor(after)
+    if len(key) != 1 or not isinstance(key[0], int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return key[0]
+
+
+def ranked_cursor(after: str | None = Query(None, description="Cursor returned in the X-Next-Cursor header")) \
+        -> tuple[float, int] | None:
+    """
+    Dependency decoding the ``after`` query parameter of listings sorted by score, then id.
+
+    :param after: The cursor from the previous page, if any.
+    :return: The score and id of the last row of the previous page, or None for the first page.
+    """
+    if after is None:
+        return None
+    key = decode_cursor(after)
+    if len(key) != 2 or not isinstance(key[0], (int, float)) or not isinstance(key[1], int):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return float(key[0]), key[1]
+
+
+def set_next_cursor(response: Response, items: Sequence, limit: int,
+                    key: Callable[[Any], tuple] = lambda item: (item.id,)) -> None:
+    """
+    Advertise the cursor of the next page of a listing.
+
+    The header is only set when the page is full, so its absence marks the last page.
+
+    :param response: The response of the listing.
+    :param items: The rows of the current page.
+    :param limit: The page size that was requested.
+    :param key: Returns the sort key of a row, its id by default.
+    """
+    if items and len(items) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(items[-1]))
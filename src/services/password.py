@@ -0,0 +1,92 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from passlib.context import CryptContext
+
+from src.conf.config import config
+
+
+@lru_cache
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str, rounds: int) -> bool:
+    return _context(rounds).verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a bounded worker pool instead of on the event loop.
+
+    At most ``max_concurrency`` operations are handed to the pool at once; the rest wait on a
+    semaphore, so a burst of logins only slows down logins. Module-level helpers are used as the
+    pool tasks so the same code runs in a thread or in a process pool.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_concurrency: int, executor: str = "thread"):
+        self.rounds = rounds
+        self.context = _context(rounds)
+        self.executor: Executor = (ProcessPoolExecutor(max_workers=workers) if executor == "process"
+                                   else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt"))
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.wait_time = 0.0
+
+    async def _run(self, fn, *args):
+        self.waiting += 1
+        start = time.perf_counter()
+        async with self._semaphore:
+            self.waiting -= 1
+            self.wait_time += time.perf_counter() - start
+            self.running += 1
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, fn, *args)
+            finally:
+                self.running -= 1
+                self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        """
+        Hash a password in the worker pool.
+
+        :param password: The plain password.
+        :return: The bcrypt hash.
+        """
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """
+        Check a password against its hash in the worker pool.
+
+        :param plain_password: The plain password.
+        :param hashed_password: The stored bcrypt hash.
+        :return: True if the password matches.
+        """
+        return await self._run(_verify, plain_password, hashed_password, self.rounds)
+
+    def stats(self) -> dict:
+        """
+        Report the queue depth and throughput of the pool.
+
+        :return: Waiting and running operations, completed operations and total seconds spent waiting.
+        """
+        return {"waiting": self.waiting, "running": self.running, "completed": self.completed,
+                "wait_time": round(self.wait_time, 6), "max_concurrency": self.max_concurrency}
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher(config.BCRYPT_ROUNDS, config.PASSWORD_HASH_WORKERS,
+                                 config.PASSWORD_HASH_MAX_CONCURRENCY, config.PASSWORD_HASH_EXECUTOR)
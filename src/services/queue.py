@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Awaitable, Callable
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+
+class JobQueue:
+    """
+    Durable job queue kept in Redis.
+
+    Jobs are JSON documents pushed on ``{name}:pending``. A worker atomically moves each job to its
+    own ``{name}:processing:{worker_id}`` list while running it, so a crash leaves the job in Redis
+    instead of losing it. Running workers keep a ``{name}:lease:{worker_id}`` key alive, and any worker
+    puts back the jobs of processing lists whose lease expired. Failed jobs are retried with
+    exponential backoff through the ``{name}:delayed`` sorted set and moved to the ``{name}:dead``
+    list once ``max_attempts`` is reached.
+    """
+
+    def __init__(self, client: redis.Redis, name: str, max_attempts: int = 5, backoff: float = 2.0,
+                 lease: float = 30):
+        self.client = client
+        self.name = name
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease = lease
+        self.handlers: dict[str, Callable[..., Awaitable]] = {}
+        self.pending = f"{name}:pending"
+        self.delayed = f"{name}:delayed"
+        self.dead = f"{name}:dead"
+
+    def task(self, name: str):
+        """
+        Register a coroutine function as the handler of a task.
+
+        :param name: The name jobs use to refer to the task.
+        :return: A decorator returning the function unchanged.
+        """
+        def decorator(fn):
+            self.handlers[name] = fn
+            return fn
+        return decorator
+
+    async def enqueue(self, task: str, **kwargs) -> str:
+        """
+        Add a job to the queue.
+
+        :param task: The name of a registered task.
+        :param kwargs: JSON-serializable arguments of the task.
+        :return: The ID of the job.
+        """
+        job_id = uuid.uuid4().hex
+        await self.client.lpush(self.pending, json.dumps({"id": job_id, "task": task, "kwargs": kwargs, "attempts": 0}))
+        return job_id
+
+    async def depth(self) -> dict:
+        """
+        Report the number of jobs in each state.
+
+        :return: The number of pending, delayed and dead jobs.
+        """
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.llen(self.pending)
+            pipe.zcard(self.delayed)
+            pipe.llen(self.dead)
+            pending, delayed, dead = await pipe.execute()
+        return {"pending": pending, "delayed": delayed, "dead": dead}
+
+    async def promote(self) -> int:
+        """
+        Move delayed jobs whose retry time has come back to the pending list.
+
+        :return: The number of jobs moved.
+        """
+        moved = 0
+        for raw in await self.client.zrangebyscore(self.delayed, "-inf", time.time(), start=0, num=100):
+            # Only the worker whose ZREM succeeds re-queues the job.
+            if await self.client.zrem(self.delayed, raw):
+                await self.client.lpush(self.pending, raw)
+                moved += 1
+        return moved
+
+    async def recover(self, worker_id: str) -> int:
+        """
+        Put back the jobs a worker was processing when it stopped.
+
+        :param worker_id: The ID of the stopped worker.
+        :return: The number of jobs put back.
+        """
+        processing = f"{self.name}:processing:{worker_id}"
+        recovered = 0
+        while await self.client.lmove(processing, self.pending, "RIGHT", "RIGHT"):
+            recovered += 1
+        return recovered
+
+    async def heartbeat(self, worker_id: str) -> None:
+        """
+        Renew the lease of a worker, telling the other workers it is still running its jobs.
+
+        :param worker_id: The ID of the worker.
+        """
+        await self.client.set(f"{self.name}:lease:{worker_id}", 1, px=int(self.lease * 1000))
+
+    async def reclaim(self) -> int:
+        """
+        Put back the jobs of every worker whose lease expired, e.g. after a crash or a container restart.
+
+        :return: The number of jobs put back.
+        """
+        prefix = f"{self.name}:processing:"
+        reclaimed = 0
+        async for key in self.client.scan_iter(match=f"{prefix}*"):
+            worker_id = (key.decode() if isinstance(key, bytes) else key)[len(prefix):]
+            if not await self.client.exists(f"{self.name}:lease:{worker_id}"):
+                reclaimed += await self.recover(worker_id)
+        return reclaimed
+
+    async def _keep_alive(self, worker_id: str) -> None:
+        while True:
+            try:
+                await self.heartbeat(worker_id)
+            except RedisError as err:
+                print(err)
+            await asyncio.sleep(self.lease / 3)
+
+    async def run_once(self, worker_id: str, timeout: float = 1) -> bool:
+        """
+        Wait for one job and run it.
+
+        :param worker_id: The ID of the worker.
+        :param timeout: Seconds to wait for a job.
+        :return: True if a job was run, False if none arrived in time.
+        """
+        await self.promote()
+        processing = f"{self.name}:processing:{worker_id}"
+        raw = await self.client.blmove(self.pending, processing, timeout, "RIGHT", "LEFT")
+        if raw is None:
+            return False
+        job = json.loads(raw)
+        try:
+            await self.handlers[job["task"]](**job["kwargs"])
+        except Exception as err:
+            job["attempts"] += 1
+            job["error"] = repr(err)
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.lrem(processing, 1, raw)
+                if job["attempts"] >= self.max_attempts:
+                    pipe.lpush(self.dead, json.dumps(job))
+                else:
+                    pipe.zadd(self.delayed, {json.dumps(job): time.time() + self.backoff ** job["attempts"]})
+                await pipe.execute()
+        else:
+            await self.client.lrem(processing, 1, raw)
+        return True
+
+    async def work(self, worker_id: str, max_delay: float = 30) -> None:
+        """
+        Run jobs until cancelled.
+
+        While it runs, the worker renews its lease in the background and reclaims the jobs of expired
+        workers once per lease period. Redis errors do not stop the worker: it reports them and retries
+        after a random delay that doubles with each consecutive failure up to ``max_delay`` seconds, so
+        workers do not reconnect all at once when Redis comes back.
+
+        :param worker_id: The ID of the worker, unique to the process, see :func:`worker_id`.
+        :param max_delay: The longest wait in seconds between two attempts.
+        """
+        keep_alive = asyncio.create_task(self._keep_alive(worker_id))
+        reclaim_at = 0.0
+        failures = 0
+        try:
+            while True:
+                try:
+                    if time.monotonic() >= reclaim_at:
+                        await self.heartbeat(worker_id)
+                        await self.reclaim()
+                        reclaim_at = time.monotonic() + self.lease
+                    await self.run_once(worker_id)
+                    failures = 0
+                except RedisError as err:
+                    print(err)
+                    failures += 1
+                    await asyncio.sleep(random.uniform(0, min(max_delay, 0.1 * 2 ** failures)))
+        finally:
+            keep_alive.cancel()
+
+
+def worker_id(name: str) -> str:
+    """
+    Build an ID unique to this process, so that workers sharing a host never share a processing list.
+
+    :param name: A name identifying the worker, e.g. its host name.
+    :return: The name followed by the process ID and a random suffix.
+    """
+    return f"{name}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
@@ -0,0 +1,140 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from functools import partial
+from itertools import groupby
+from typing import Sequence
+
+import aiosmtplib
+from jinja2 import Template
+from sqlalchemy import Row
+
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.repository import contacts as repository_contacts
+from src.services.cache import redis_client
+from src.services.email import templates
+from src.services.smtp import SMTPPool, smtp_pool
+
+
+class RedisIdempotencyStore:
+    """
+    Remembers which reminders were already sent, so a rerun never mails the same digest twice.
+    """
+
+    def __init__(self, client, ttl: int = 2 * 24 * 3600, prefix: str = "reminder:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def claim(self, key: str) -> bool:
+        """
+        Atomically mark a reminder as being sent.
+
+        :param key: The idempotency key of the reminder.
+        :return: True if the caller should send it, False if it was already claimed.
+        """
+        return bool(await self.client.set(self.prefix + key, 1, nx=True, ex=self.ttl))
+
+    async def release(self, key: str) -> None:
+        """
+        Forget a claim after a failed send so the next run retries it.
+
+        :param key: The idempotency key of the reminder.
+        """
+        await self.client.delete(self.prefix + key)
+
+
+class BirthdayReminders:
+    """
+    Sends each user one digest of their contacts' upcoming birthdays.
+
+    Birthdays are read in keyset pages on a short-lived session per page, grouped by owner and mailed
+    through a shared SMTP pool. Every digest carries an idempotency key, also used as its Message-ID,
+    made of the owner and the day of the run.
+    """
+
+    def __init__(self, session_factory, smtp: SMTPPool, store, sender: str, days: int, page_size: int):
+        self.session_factory = session_factory
+        self.smtp = smtp
+        self.store = store
+        self.sender = sender
+        self.days = days
+        self.page_size = page_size
+
+    async def run(self, today: date | None = None) -> dict:
+        """
+        Send the reminders of one day.
+
+        :param today: The first day of the birthday window, today by default.
+        :return: The number of digests sent, skipped because already sent, and failed.
+        """
+        today = today or date.today()
+        ranges = repository_contacts.upcoming_birthday_ranges(today, self.days)
+        template = templates.get_template("birthday_reminder.html")
+        stats = {"sent": 0, "skipped": 0, "failed": 0}
+        after = None
+        pending: list[Row] = []
+        while True:
+            async with self.session_factory() as db:
+                page = await repository_contacts.get_upcoming_birthdays_page(db, ranges, self.page_size, after)
+            rows = pending + list(page)
+            if len(page) < self.page_size:
+                await self._send_batch(rows, template, today, stats)
+                return stats
+            after = (page[-1].user_id, page[-1].id)
+            # The last user of a full page may continue on the next one, so hold their rows back.
+            split = len(rows)
+            while split and rows[split - 1].user_id == page[-1].user_id:
+                split -= 1
+            pending = rows[split:]
+            await self._send_batch(rows[:split], template, today, stats)
+
+    async def _send_batch(self, rows: Sequence[Row], template: Template, today: date, stats: dict) -> None:
+        digests = [list(group) for _, group in groupby(rows, key=lambda row: row.user_id)]
+        await asyncio.gather(*(self._send_digest(digest, template, today, stats) for digest in digests))
+
+    async def _send_digest(self, rows: list[Row], template: Template, today: date, stats: dict) -> None:
+        owner = rows[0]
+        key = f"birthday.{owner.user_id}.{today.isoformat()}"
+        if not await self.store.claim(key):
+            stats["skipped"] += 1
+            return
+        message = EmailMessage()
+        message["Subject"] = "Upcoming birthdays"
+        message["From"] = formataddr(("TODO Systems", self.sender))
+        message["To"] = owner.email
+        message["Message-ID"] = f"<{key}@{self.sender.rsplit('@', 1)[-1]}>"
+        message.set_content(template.render(username=owner.username, days=self.days, contacts=rows), subtype="html")
+        try:
+            await self.smtp.send(message)
+        except (aiosmtplib.SMTPException, OSError) as err:
+            print(err)
+            await self.store.release(key)
+            stats["failed"] += 1
+        else:
+            stats["sent"] += 1
+
+
+async def run_scheduler(reminders: BirthdayReminders, hour: int) -> None:
+    """
+    Run the reminders every day at the given hour, until cancelled.
+
+    :param reminders: The reminders pipeline.
+    :param hour: The local hour of the daily run.
+    """
+    while True:
+        now = datetime.now()
+        next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        print(await reminders.run())
+
+
+birthday_reminders = BirthdayReminders(partial(sessionmanager.session, readonly=True), smtp_pool,
+                                       RedisIdempotencyStore(redis_client), config.MAIL_USERNAME, config.BIRTHDAY_WINDOW_DAYS, config.REMINDER_PAGE_SIZE)
+
+if __name__ == "__main__":
+    asyncio.run(run_scheduler(birthday_reminders, config.REMINDER_HOUR))
@@ -0,0 +1,83 @@
+from collections.abc import Mapping
+from functools import lru_cache
+from types import NoneType, UnionType
+from typing import Any, Union, get_args, get_origin
+
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from src.conf.config import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson is optional: without it the fast path still skips validation but keeps the stdlib encoder
+# for the responses FastAPI renders itself.
+default_response_class = ORJSONResponse if config.FAST_JSON and orjson is not None else JSONResponse
+
+
+@lru_cache
+def _adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def construct(response_model: Any, content: Any) -> Any:
+    """
+    Build response models from trusted objects with ``model_construct``, without validating them.
+
+    :param response_model: A Pydantic model, a list of models or an optional model.
+    :param content: ORM entities, row mappings or models with the fields of ``response_model``.
+    :return: The content as instances of ``response_model``.
+    """
+    if content is None:
+        return None
+    origin = get_origin(response_model)
+    if origin is list:
+        (item_model,) = get_args(response_model)
+        return [construct(item_model, item) for item in content]
+    if origin in (Union, UnionType):
+        models = [arg for arg in get_args(response_model) if arg is not NoneType]
+        return construct(models[0], content) if len(models) == 1 else content
+    if not (isinstance(response_model, type) and issubclass(response_model, BaseModel)) \
+            or isinstance(content, response_model):
+        return content
+    if isinstance(content, Mapping):
+        values = {name: content[name] for name in response_model.model_fields if name in content}
+    else:
+        values = {name: getattr(content, name) for name in response_model.model_fields}
+    return response_model.model_construct(**{name: construct(response_model.model_fields[name].annotation, value)
+                                             for name, value in values.items()})
+
+
+def dump_json(content: Any, response_model: Any) -> bytes:
+    """
+    Serialize the result of an endpoint to JSON with the Rust serializer of Pydantic.
+
+    With ``FAST_JSON`` the content comes from the database and is trusted, so the models are built
+    with ``construct``; otherwise it is validated like FastAPI would.
+
+    :param content: What the endpoint would have returned.
+    :param response_model: The response model of the endpoint.
+    :return: The JSON document.
+    """
+    adapter = _adapter(response_model)
+    if config.FAST_JSON:
+        return adapter.dump_json(construct(response_model, content))
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def json_response(content: Any, response_model: Any, response: Response | None = None) -> Response:
+    """
+    Render the result of an endpoint without FastAPI's validation and encoding of ``response_model``.
+
+    :param content: What the endpoint would have returned.
+    :param response_model: The response model of the endpoint.
+    :param response: The response injected in the endpoint, whose headers are kept.
+    :return: The response to send.
+    """
+    headers = {name: value for name, value in response.headers.items()
+               if name not in ("content-length", "content-type")} if response is not None else None
+    return Response(dump_json(content, response_model), media_type="application/json", headers=headers)
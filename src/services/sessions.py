@@ -0,0 +1,109 @@
+import time
+
+from fastapi import Request, Response
+from jose import JWTError, jwt
+from redis.exceptions import RedisError
+from sqlalchemy import event
+
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.services.cache import redis_client
+
+STICKY_COOKIE = "db_primary_until"
+STICKY_PREFIX = "db:primary:"
+
+
+def is_sticky(request: Request) -> bool:
+    """
+    Check whether the caller wrote recently and must read from the primary.
+
+    :param request: The current request.
+    :return: True while the cookie set after the caller's last write is valid.
+    """
+    until = request.cookies.get(STICKY_COOKIE, "")
+    return until.isdigit() and int(until) > time.time()
+
+
+def stick_to_primary(response: Response) -> None:
+    """
+    Keep the reads of the caller on the primary for ``DB_STICKY_SECONDS``, so they see their own writes.
+
+    :param response: The response of the request that wrote.
+    """
+    response.set_cookie(STICKY_COOKIE, str(int(time.time()) + config.DB_STICKY_SECONDS),
+                        max_age=config.DB_STICKY_SECONDS, httponly=True)
+
+
+def principal_of(request: Request) -> str | None:
+    """
+    Identify the caller from the bearer token of the request.
+
+    :param request: The current request.
+    :return: The subject of a valid access token, or None.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, config.KEY_JWT, algorithms=[config.ALG])
+    except JWTError:
+        return None
+    return payload.get("sub") if payload.get("scope") == "access_token" else None
+
+
+async def reads_primary(request: Request) -> bool:
+    """
+    Check whether the reads of the request must run on the primary.
+
+    They must when no replica is configured, or when the caller wrote recently: either the request
+    carries the cookie of :func:`stick_to_primary`, or the principal of its bearer token is marked in
+    Redis, for clients that do not keep cookies.
+
+    :param request: The current request.
+    :return: True if the reads must run on the primary.
+    """
+    if not sessionmanager.replicated or is_sticky(request):
+        return True
+    if (principal := principal_of(request)) is None:
+        return False
+    try:
+        return bool(await redis_client.exists(f"{STICKY_PREFIX}{principal}"))
+    except RedisError as err:
+        print(err)
+        return False
+
+
+async def get_db(request: Request, response: Response):
+    """
+    Dependency providing a session on the primary for endpoints that write.
+
+    Once the session commits, the response carries the cookie of :func:`stick_to_primary`. The cookie
+    is set from the commit of this session only, while the endpoint runs, because the teardown of
+    dependencies runs after the response has been sent. When replicas are configured, the principal of
+    the bearer token is also marked in Redis for ``DB_STICKY_SECONDS`` before the endpoint runs, so
+    the mark is in place before the client can read again.
+    """
+    if sessionmanager.replicated and (principal := principal_of(request)) is not None:
+        try:
+            await redis_client.set(f"{STICKY_PREFIX}{principal}", 1, ex=config.DB_STICKY_SECONDS)
+        except RedisError as err:
+            print(err)
+    async with sessionmanager.session() as session:
+        event.listen(session.sync_session, "after_commit", lambda _: stick_to_primary(response))
+        request.state.db = session
+        yield session
+
+
+async def get_read_db(request: Request):
+    """
+    Dependency providing a session for read-only endpoints.
+
+    The session runs on a replica when replicas are configured, unless :func:`reads_primary` keeps it on the primary, and
+    holds a pooled connection only while a statement runs. Requests that already opened a session with
+    :func:`get_db`, e.g. writes that also authenticate the caller, reuse it instead of opening another.
+    """
+    if (session := getattr(request.state, "db", None)) is not None:
+        yield session
+        return
+    async with sessionmanager.session(readonly=True, primary=await reads_primary(request)) as session:
+        yield session
@@ -0,0 +1,74 @@
+import asyncio
+from email.message import EmailMessage
+
+import aiosmtplib
+
+from src.conf.config import config
+
+
+class SMTPPool:
+    """
+    Pool of persistent SMTP connections.
+
+    At most ``size`` messages are in flight at once, each on its own connection, and connections are
+    kept open between messages instead of being opened per message. A failed send drops its
+    connection and is retried on a fresh one with exponential backoff.
+    """
+
+    def __init__(self, hostname: str, port: int, username: str | None = None, password: str | None = None,
+                 use_tls: bool = False, start_tls: bool = False, size: int = 4, retries: int = 3,
+                 backoff: float = 1.0):
+        self.options = dict(hostname=hostname, port=port, username=username, password=password,
+                            use_tls=use_tls, start_tls=start_tls)
+        self.size = size
+        self.retries = retries
+        self.backoff = backoff
+        self._idle: list[aiosmtplib.SMTP] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _acquire(self) -> aiosmtplib.SMTP:
+        while self._idle:
+            client = self._idle.pop()
+            if client.is_connected:
+                return client
+        client = aiosmtplib.SMTP(**self.options)
+        await client.connect()
+        return client
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Send a message, retrying transient failures.
+
+        :param message: The message to send.
+        :raises aiosmtplib.SMTPException: If the message could not be sent after all retries.
+        """
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                client = None
+                try:
+                    client = await self._acquire()
+                    await client.send_message(message)
+                except (aiosmtplib.SMTPException, OSError):
+                    if client is not None:
+                        client.close()
+                    if attempt == self.retries:
+                        raise
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+                else:
+                    self._idle.append(client)
+                    return
+
+    async def close(self) -> None:
+        """
+        Close all idle connections.
+        """
+        while self._idle:
+            client = self._idle.pop()
+            try:
+                await client.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                client.close()
+
+
+smtp_pool = SMTPPool(config.MAIL_SERVER, config.MAIL_PORT, config.MAIL_USERNAME, config.MAIL_PASSWORD,
+                     use_tls=True, size=config.MAIL_POOL_SIZE, retries=config.MAIL_RETRIES)
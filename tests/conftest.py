@@ -1,4 +1,9 @@
 import asyncio
+import atexit
+import os
+import shutil
+import tempfile
+from pathlib import Path
 
 import pytest
 import pytest_asyncio
@@ -8,10 +13,15 @@ from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, Asyn
 
 from main import app
 from src.entity.models import Base, User
-from src.database.db import get_db
+from src.services.sessions import get_db, get_read_db
 from src.services.auth import auth_service
 
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+# The database lives in a temporary directory, removed when the test run ends. pytest imports this
+# module twice (as ``conftest`` and ``tests.conftest``), so both copies share the directory of the run.
+if "TEST_DATABASE_DIR" not in os.environ:
+    os.environ["TEST_DATABASE_DIR"] = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, os.environ["TEST_DATABASE_DIR"], ignore_errors=True)
+SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{Path(os.environ['TEST_DATABASE_DIR']) / 'test.db'}"
 
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}, poolclass=StaticPool
@@ -53,6 +63,7 @@ def client():
             await session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     yield TestClient(app)
 
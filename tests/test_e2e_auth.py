@@ -1,6 +1,7 @@
-from unittest.mock import Mock
+from unittest.mock import AsyncMock
 
 import pytest
+from redis.exceptions import RedisError
 from sqlalchemy import select
 
 from src.entity.models import User
@@ -11,8 +12,8 @@ user_data = {"username": "agent007", "email": "agent007@gmail.com", "password":
 
 
 def test_signup(client, monkeypatch):
-    mock_send_email = Mock()
-    monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
+    mock_enqueue_email = AsyncMock()
+    monkeypatch.setattr("src.routes.auth.enqueue_email", mock_enqueue_email)
     response = client.post("api/auth/signup", json=user_data)
     assert response.status_code == 201, response.text
     data = response.json()
@@ -20,17 +21,25 @@ def test_signup(client, monkeypatch):
     assert data["email"] == user_data["email"]
     assert "password" not in data
     assert "avatar" in data
+    mock_enqueue_email.assert_awaited_once()
 
 
 def test_repeat_signup(client, monkeypatch):
-    mock_send_email = Mock()
-    monkeypatch.setattr("src.routes.auth.send_email", mock_send_email)
+    mock_enqueue_email = AsyncMock()
+    monkeypatch.setattr("src.routes.auth.enqueue_email", mock_enqueue_email)
     response = client.post("api/auth/signup", json=user_data)
     assert response.status_code == 409, response.text
     data = response.json()
     assert data["detail"] == messages.ACCOUNT_EXIST
 
 
+def test_signup_without_redis(client, monkeypatch):
+    monkeypatch.setattr("src.services.email.email_queue.enqueue", AsyncMock(side_effect=RedisError("down")))
+    response = client.post("api/auth/signup",
+                           json={"username": "agent008", "email": "agent008@gmail.com", "password": "12345678"})
+    assert response.status_code == 201, response.text
+
+
 def test_not_confirmed_login(client):
     response = client.post("api/auth/login",
                            data={"username": user_data.get("email"), "password": user_data.get("password")})
@@ -79,3 +88,15 @@ def test_validation_error_login(client):
     assert response.status_code == 422, response.text
     data = response.json()
     assert "detail" in data
+
+
+def test_metrics_require_token(client, monkeypatch):
+    monkeypatch.setattr("src.conf.config.config.METRICS_TOKEN", None)
+    assert client.get("api/metrics").status_code == 404
+
+    monkeypatch.setattr("src.conf.config.config.METRICS_TOKEN", "scrape")
+    assert client.get("api/metrics").status_code == 401
+    assert client.get("api/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.get("api/metrics", headers={"Authorization": "Bearer scrape"})
+    assert response.status_code == 200, response.text
+    assert "database" in response.json()
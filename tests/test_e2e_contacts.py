@@ -0,0 +1,191 @@
+import csv
+import io
+import json
+from datetime import date
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy import Select, insert
+
+from main import app
+from src.entity.models import Contact
+from src.entity.principal import Principal
+from src.repository.contacts import get_contacts_upcoming_birthdays, import_contacts
+from src.services.auth import auth_service
+from src.services.autocomplete import MemoryAutocomplete
+from tests.conftest import TestingSessionLocal, test_user
+
+principal = Principal(id=1, email=test_user["email"], username=test_user["username"], avatar=None, confirmed=True)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def current_user():
+    app.dependency_overrides[auth_service.get_current_user] = lambda: principal
+    yield principal
+    del app.dependency_overrides[auth_service.get_current_user]
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(client):
+    async with TestingSessionLocal() as session:
+        session.add_all([Contact(name=f"name_{i}", lastname="lastname", email=f"export_{i}@example.com",
+                                 phone="123", address="address", birthday=date(2000, 1, i + 1), user_id=1)
+                         for i in range(3)])
+        session.add(Contact(name="other", lastname="lastname", email="other@example.com", phone="123",
+                            address="address", birthday=date(2000, 2, 1), user_id=2))
+        await session.commit()
+
+    response = client.get("api/contacts/export")
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["email"] for row in rows] == [f"export_{i}@example.com" for i in range(3)]
+    assert rows[0]["birthday"] == "2000-01-01"
+    assert "user_id" not in rows[0]
+
+
+def test_export_csv(client):
+    response = client.get("api/contacts/export", params={"format": "csv"})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+    assert rows[2]["birthday"] == "2000-01-03"
+
+
+def test_export_unknown_format(client):
+    response = client.get("api/contacts/export", params={"format": "xml"})
+    assert response.status_code == 422, response.text
+
+
+def test_import_contacts(client):
+    contacts = [{"name": f"import_{i}", "lastname": "lastname", "email": f"import_{i}@example.com", "phone": "123",
+                 "address": "address", "birthday": "2000-03-01"} for i in range(3)]
+    contacts.append(dict(contacts[0]))
+    contacts.append({**contacts[1], "email": "export_0@example.com"})
+    contacts.append({**contacts[2], "name": "x", "email": "invalid@example.com"})
+
+    response = client.post("api/contacts/import", json=contacts)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["created"] == 3
+    assert len(data["ids"]) == 3
+    assert [(error["index"], error["email"]) for error in data["errors"]] == [
+        (3, "import_0@example.com"), (4, "export_0@example.com"), (5, "invalid@example.com")]
+    assert data["errors"][0]["detail"] == "Duplicate email in import"
+    assert data["errors"][1]["detail"] == "Contact already exists"
+    assert data["errors"][2]["detail"].startswith("name:")
+
+
+def test_import_contacts_csv(client):
+    content = ("name,lastname,email,phone,address,birthday\n"
+               "csv_one,lastname,csv_1@example.com,123,address,2000-04-01\n"
+               "csv_two,lastname,import_0@example.com,123,address,2000-04-02\n"
+               "csv_three,lastname,csv_3@example.com,123,address,\n")
+
+    response = client.post("api/contacts/import/csv", files={"file": ("contacts.csv", content, "text/csv")})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["created"] == 1
+    assert [error["index"] for error in data["errors"]] == [1, 2]
+    assert data["errors"][0]["detail"] == "Contact already exists"
+    assert "birthday" in data["errors"][1]["detail"]
+
+
+@pytest.mark.asyncio
+async def test_upcoming_birthdays_across_new_year(client):
+    async with TestingSessionLocal() as session:
+        contacts = await get_contacts_upcoming_birthdays(session, principal, 7, today=date(2023, 12, 30))
+    assert [contact.email for contact in contacts] == [f"export_{i}@example.com" for i in range(3)]
+
+
+def test_upcoming_birthdays_route(client):
+    response = client.get("api/contacts/birthdays", params={"days": 366})
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 7
+
+
+@pytest.mark.asyncio
+async def test_search_contacts(client):
+    async with TestingSessionLocal() as session:
+        session.add_all([
+            Contact(name="Johanna", lastname="Searchfield", email="jo.search@example.com", phone="5550101",
+                    address="address", birthday=date(1990, 5, 1), user_id=1),
+            Contact(name="John", lastname="Searcher", email="john@example.com", phone="5550102",
+                    address="address", birthday=date(1990, 5, 2), user_id=1),
+            Contact(name="Johnny", lastname="Other", email="johnny@example.com", phone="5550103",
+                    address="address", birthday=date(1990, 5, 3), user_id=2),
+        ])
+        await session.commit()
+
+    response = client.get("api/contacts/search", params={"q": "joh sear"})
+    assert response.status_code == 200, response.text
+    assert sorted(contact["name"] for contact in response.json()) == ["Johanna", "John"]
+    assert "X-Next-Cursor" not in response.headers
+
+    response = client.get("api/contacts/search", params={"q": "5550102"})
+    assert [contact["email"] for contact in response.json()] == ["john@example.com"]
+
+
+def test_search_contacts_pages(client):
+    first = client.get("api/contacts/search", params={"q": "joh", "limit": 1})
+    assert first.status_code == 200, first.text
+    second = client.get("api/contacts/search", params={"q": "joh", "limit": 1,
+                                                       "after": first.headers["X-Next-Cursor"]})
+    assert second.status_code == 200, second.text
+    assert [contact["name"] for contact in first.json() + second.json()] in (["Johanna", "John"],
+                                                                              ["John", "Johanna"])
+    assert "X-Next-Cursor" in second.headers
+    third = client.get("api/contacts/search", params={"q": "joh", "limit": 1,
+                                                      "after": second.headers["X-Next-Cursor"]})
+    assert third.json() == []
+
+
+def test_search_contacts_after_update(client):
+    response = client.get("api/contacts/search", params={"q": "searcher"})
+    contact = response.json()[0]
+    response = client.put(f"api/contacts/{contact['id']}", json={**contact, "lastname": "Finder"})
+    assert response.status_code == 200, response.text
+
+    assert client.get("api/contacts/search", params={"q": "searcher"}).json() == []
+    assert [c["id"] for c in client.get("api/contacts/search", params={"q": "finder"}).json()] == [contact["id"]]
+
+
+def test_autocomplete_contacts(client, monkeypatch):
+    index = MemoryAutocomplete()
+    monkeypatch.setattr("src.repository.contacts.autocomplete", index)
+    monkeypatch.setattr("src.routes.contacts.autocomplete", index)
+    response = client.post("api/contacts", json={"name": "Zelda", "lastname": "Typeahead", "email": "zelda@example.com",
+                                                 "phone": "5550199", "address": "address", "birthday": "1990-05-04"})
+    assert response.status_code == 201, response.text
+    contact_id = response.json()["id"]
+
+    response = client.get("api/contacts/autocomplete", params={"q": "typ"})
+    assert response.status_code == 200, response.text
+    assert response.json() == [{"id": contact_id, "label": "Zelda Typeahead <zelda@example.com>"}]
+
+    client.delete(f"api/contacts/{contact_id}")
+    assert client.get("api/contacts/autocomplete", params={"q": "typ"}).json() == []
+
+
+@pytest.mark.asyncio
+async def test_import_retries_row_by_row_after_a_conflict(client, monkeypatch):
+    index = AsyncMock()
+    monkeypatch.setattr("src.repository.contacts.autocomplete", index)
+    rows = [{"name": f"race_{i}", "lastname": "lastname", "email": f"race_{i}@example.com", "phone": "123",
+             "address": "address", "birthday": "2000-03-01"} for i in range(2)]
+    async with TestingSessionLocal() as session:
+        execute = session.execute
+
+        async def racing_execute(stmt, *args, **kwargs):
+            result = await execute(stmt, *args, **kwargs)
+            if isinstance(stmt, Select):
+                # Another writer takes an email between the existence check and the multi-row INSERT
+                await execute(insert(Contact).values({**rows[0], "birthday": date(2000, 3, 1), "user_id": 1}))
+            return result
+
+        monkeypatch.setattr(session, "execute", racing_execute)
+        result = await import_contacts(rows, session, principal)
+    assert result.created == 2
+    index.add.assert_awaited_once()
+    assert [contact.email for contact in index.add.await_args.args[1]] == [row["email"] for row in rows]
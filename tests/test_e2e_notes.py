@@ -0,0 +1,207 @@
+import asyncio
+
+import httpx
+import pytest
+from fakeredis import FakeAsyncRedis
+from sqlalchemy import Engine, event, select
+
+from main import app
+from src.entity.models import Note, Tag, note_tag_association
+from src.entity.principal import Principal
+from src.services.auth import auth_service
+from src.services.cache import tag_cache
+from src.services.http_cache import response_cache
+from tests.conftest import TestingSessionLocal, test_user
+
+principal = Principal(id=1, email=test_user["email"], username=test_user["username"], avatar=None, confirmed=True)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def notes():
+    async def seed():
+        async with TestingSessionLocal() as session:
+            tags = [Tag(name=f"tag{i}", user_id=principal.id) for i in range(5)]
+            session.add_all(Note(title=f"note{i}", description="description", tags=tags[i % 5:i % 5 + 2],
+                                 user_id=principal.id)
+                            for i in range(500))
+            # Another user's note and tag of the same name
+            session.add(Note(title="other", description="description", tags=[Tag(name="tag0", user_id=2)],
+                             user_id=2))
+            await session.commit()
+
+    app.dependency_overrides[auth_service.get_current_user] = lambda: principal
+    asyncio.run(seed())
+    yield
+    del app.dependency_overrides[auth_service.get_current_user]
+
+
+@pytest.fixture()
+def statements():
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(Engine, "before_cursor_execute", record)
+
+
+
+@pytest.fixture()
+def cached_client(client, monkeypatch):
+    # The fake Redis connection is bound to one event loop, so the requests run on the loop of the test.
+    redis_client = FakeAsyncRedis()
+    monkeypatch.setattr(response_cache, "client", redis_client)
+    monkeypatch.setattr(tag_cache, "client", redis_client)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def test_read_notes_loads_tags_in_one_query(client, statements):
+    response = client.get("api/notes", params={"limit": 500})
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert len(data) == 500
+    assert all(note["tags"] for note in data)
+    assert data[4]["tags"] == [{"name": "tag4", "id": 5}]
+    assert len(statements) == 2, statements
+
+
+def test_read_note(client, statements):
+    response = client.get("api/notes/2")
+    assert response.status_code == 200, response.text
+    assert [tag["name"] for tag in response.json()["tags"]] == ["tag1", "tag2"]
+    assert len(statements) == 2, statements
+
+
+def test_notes_of_other_users_are_hidden(client):
+    response = client.get("api/notes", params={"limit": 500})
+    response = client.get("api/notes", params={"after": response.headers["X-Next-Cursor"]})
+    assert response.status_code == 200, response.text
+    assert response.json() == []
+    response = client.get("api/notes/501")
+    assert response.status_code == 404, response.text
+    response = client.get("api/tags", params={"limit": 100})
+    assert [tag["name"] for tag in response.json()] == [f"tag{i}" for i in range(5)]
+
+
+def test_create_note_with_own_tags_only(client):
+    response = client.post("api/notes", json={"title": "new", "description": "description", "tags": [1, 6]})
+    assert response.status_code == 200, response.text
+    assert response.json()["tags"] == [{"name": "tag0", "id": 1}]
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_skip_the_database(cached_client, statements):
+    response = await cached_client.get("api/tags/", params={"limit": 3})
+    assert response.status_code == 200, response.text
+    etag = response.headers["ETag"]
+    statements.clear()
+
+    cached = await cached_client.get("api/tags/", params={"limit": 3})
+    assert cached.content == response.content
+    assert cached.headers["ETag"] == etag
+    assert cached.headers["X-Next-Cursor"] == response.headers["X-Next-Cursor"]
+    not_modified = await cached_client.get("api/tags/", params={"limit": 3}, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_writes_invalidate_cached_responses(cached_client):
+    response = await cached_client.get("api/notes/3")
+    etag = response.headers["ETag"]
+    assert (await cached_client.get("api/notes/3", headers={"If-None-Match": etag})).status_code == 304
+
+    response = await cached_client.put("api/notes/3", json={"title": "note2", "description": "description",
+                                                           "done": True, "tags": [1]})
+    assert response.status_code == 200, response.text
+    response = await cached_client.get("api/notes/3", headers={"If-None-Match": etag})
+    assert response.status_code == 200, response.text
+    assert response.json()["tags"] == [{"name": "tag0", "id": 1}]
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_note_writes_read_tags_from_cache(cached_client, statements):
+    body = {"title": "cached", "description": "description", "tags": [1, 2]}
+    assert (await cached_client.post("api/notes/", json=body)).status_code == 200
+    statements.clear()
+
+    response = await cached_client.post("api/notes/", json=body)
+    assert response.status_code == 200, response.text
+    assert response.json()["tags"] == [{"name": "tag0", "id": 1}, {"name": "tag1", "id": 2}]
+    assert not any(statement.startswith("SELECT") and "FROM tags" in statement for statement in statements), \
+        statements
+    response = await cached_client.get(f"api/notes/{response.json()['id']}")
+    assert [tag["id"] for tag in response.json()["tags"]] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_note_writes_skip_deleted_tags_left_in_cache(cached_client):
+    await tag_cache.set_many({1: {999: "deleted"}})
+    body = {"title": "stale", "description": "description", "tags": [1, 999]}
+
+    response = await cached_client.post("api/notes/", json=body)
+    assert response.status_code == 200, response.text
+    assert [tag["id"] for tag in response.json()["tags"]] == [1]
+    response = await cached_client.put(f"api/notes/{response.json()['id']}", json={**body, "done": False})
+    assert response.status_code == 200, response.text
+    assert [tag["id"] for tag in response.json()["tags"]] == [1]
+
+    response = await cached_client.post("api/notes/batch", json=[body])
+    assert response.status_code == 200, response.text
+    async with TestingSessionLocal() as session:
+        tag_ids = await session.scalars(select(note_tag_association.c.tag_id)
+                                        .filter(note_tag_association.c.note_id == response.json()["ids"][0]))
+        assert tag_ids.all() == [1]
+
+
+def test_create_notes_batch(client, statements):
+    response = client.post("api/notes/batch", json=[
+        {"title": "batch0", "description": "description", "tags": [1, 2, 6]},
+        {"title": "x" * 51, "description": "description", "tags": []},
+        {"title": "batch2", "description": "description", "tags": []},
+    ])
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert len(data["ids"]) == 2
+    assert [error["index"] for error in data["errors"]] == [1]
+    # SQLite cannot order RETURNING rows of a multi-row INSERT, so only the tags are batched here
+    assert len([s for s in statements if s.startswith("INSERT INTO note_tag_association")]) == 1, statements
+
+    response = client.get(f"api/notes/{data['ids'][0]}")
+    assert [tag["id"] for tag in response.json()["tags"]] == [1, 2]
+
+
+def test_update_notes_batch(client):
+    ids = client.post("api/notes/batch", json=[{"title": f"batch{i}", "description": "description", "tags": [1]}
+                                               for i in range(3)]).json()["ids"]
+
+    response = client.patch("api/notes/batch", json=[
+        {"id": ids[0], "done": True},
+        {"id": ids[1], "tags": [3]},
+        {"id": 501, "done": True},
+        {"id": ids[0], "done": False},
+        {"done": True},
+    ])
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["ids"] == ids[:2]
+    assert [(error["index"], error["detail"]) for error in data["errors"]] == [
+        (2, "Note not found"), (3, "Duplicate note in batch"), (4, "id: Field required")]
+    assert [tag["id"] for tag in client.get(f"api/notes/{ids[1]}").json()["tags"]] == [3]
+    assert [tag["id"] for tag in client.get(f"api/notes/{ids[2]}").json()["tags"]] == [1]
+
+
+def test_notes_batch_size_is_limited(client):
+    response = client.post("api/notes/batch", json=[{"title": "t", "description": "d", "tags": []}] * 1001)
+    assert response.status_code == 422, response.text
+
+
+def test_batch_items_are_documented(client):
+    paths = client.get("openapi.json").json()["paths"]["/api/notes/batch"]
+    for method, model in [("post", "NoteModel"), ("patch", "NoteBatchUpdate")]:
+        schema = paths[method]["requestBody"]["content"]["application/json"]["schema"]
+        assert {"$ref": f"#/components/schemas/{model}"} in schema["items"]["anyOf"]
@@ -0,0 +1,124 @@
+import asyncio
+import socket
+from datetime import date
+
+import pytest
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Message
+
+from src.entity.models import Contact, User
+from src.services.reminders import BirthdayReminders
+from src.services.smtp import SMTPPool
+from tests.conftest import TestingSessionLocal
+
+
+class Inbox(Message):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def handle_message(self, message):
+        self.messages.append(message)
+
+
+class MemoryIdempotencyStore:
+    def __init__(self):
+        self.keys = set()
+
+    async def claim(self, key):
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+    async def release(self, key):
+        self.keys.discard(key)
+
+
+class EphemeralController(Controller):
+    # Bind port 0 and read back the port the OS assigned, before the controller connects to it.
+    def _trigger_server(self):
+        self.port = self.server.sockets[0].getsockname()[1]
+        super()._trigger_server()
+
+
+@pytest.fixture(scope="module")
+def inbox():
+    handler = Inbox()
+    controller = EphemeralController(handler, hostname="127.0.0.1", port=0)
+    controller.start()
+    handler.port = controller.port
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture()
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def birthdays():
+    async def create():
+        async with TestingSessionLocal() as session:
+            owners = [User(username=f"owner_{i}", email=f"owner_{i}@example.com", password="hash", confirmed=True)
+                      for i in range(3)]
+            session.add_all(owners)
+            await session.flush()
+            for i, owner in enumerate(owners):
+                session.add_all([Contact(name=f"friend_{i}_{j}", lastname="lastname", email=f"friend_{i}_{j}@example.com",
+                                         phone="123", address="address", birthday=date(1990, 12, 30 + j % 2),
+                                         user_id=owner.id) for j in range(i + 1)])
+            session.add(Contact(name="far", lastname="lastname", email="far@example.com", phone="123",
+                                address="address", birthday=date(1990, 6, 1), user_id=owners[0].id))
+            await session.commit()
+            return {owner.email: owner.id for owner in owners}
+
+    return asyncio.run(create())
+
+
+@pytest.mark.asyncio
+async def test_birthday_reminders(inbox, birthdays):
+    store = MemoryIdempotencyStore()
+    smtp = SMTPPool("127.0.0.1", inbox.port, size=2, retries=0)
+    reminders = BirthdayReminders(TestingSessionLocal, smtp, store, "reminders@example.com", days=7, page_size=2)
+
+    stats = await reminders.run(today=date(2023, 12, 28))
+    await smtp.close()
+
+    assert stats == {"sent": 3, "skipped": 0, "failed": 0}
+    assert sorted(message["To"] for message in inbox.messages) == [f"owner_{i}@example.com" for i in range(3)]
+    digest = next(message for message in inbox.messages if message["To"] == "owner_2@example.com")
+    body = digest.get_payload(decode=True).decode()
+    assert all(f"friend_2_{j}" in body for j in range(3))
+    assert "far" not in body
+    assert digest["Message-ID"] == f"<birthday.{birthdays['owner_2@example.com']}.2023-12-28@example.com>"
+
+
+@pytest.mark.asyncio
+async def test_birthday_reminders_are_idempotent(inbox):
+    store = MemoryIdempotencyStore()
+    smtp = SMTPPool("127.0.0.1", inbox.port, size=2, retries=0)
+    reminders = BirthdayReminders(TestingSessionLocal, smtp, store, "reminders@example.com", days=7, page_size=100)
+    inbox.messages.clear()
+
+    await reminders.run(today=date(2023, 12, 28))
+    stats = await reminders.run(today=date(2023, 12, 28))
+    await smtp.close()
+
+    assert stats == {"sent": 0, "skipped": 3, "failed": 0}
+    assert len(inbox.messages) == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_reminders_are_released(closed_port):
+    store = MemoryIdempotencyStore()
+    smtp = SMTPPool("127.0.0.1", closed_port, size=1, retries=1, backoff=0)
+    reminders = BirthdayReminders(TestingSessionLocal, smtp, store, "reminders@example.com", days=7, page_size=100)
+
+    stats = await reminders.run(today=date(2023, 12, 28))
+
+    assert stats == {"sent": 0, "skipped": 0, "failed": 3}
+    assert store.keys == set()
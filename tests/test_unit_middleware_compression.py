@@ -0,0 +1,101 @@
+import asyncio
+import json
+import unittest
+import zlib
+
+from fastapi.responses import Response, StreamingResponse
+
+from src.middleware.compression import CompressionMiddleware, negotiate
+
+
+async def run(app, accept_encoding: str | None = "gzip") -> tuple[dict, list[bytes]]:
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""}
+    messages = []
+    requests = iter([{"type": "http.request", "body": b""}])
+    disconnected = asyncio.Event()
+
+    async def receive():
+        # Streaming responses wait for a disconnect while they run; the client never leaves.
+        if (message := next(requests, None)) is not None:
+            return message
+        await disconnected.wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await CompressionMiddleware(app, minimum_size=100)(scope, receive, send)
+    start, *bodies = messages
+    return start, [message["body"] for message in bodies]
+
+
+def header(start: dict, name: str) -> str | None:
+    return dict(start["headers"]).get(name.encode(), b"").decode() or None
+
+
+def contacts_page(count: int = 500) -> bytes:
+    return json.dumps([{"id": i, "name": f"name{i}", "lastname": "lastname", "email": f"contact{i}@example.com",
+                        "phone": "380501234567", "address": "Kyiv, Khreshchatyk street", "birthday": "1990-01-01"}
+                       for i in range(count)]).encode()
+
+
+class TestCompressionMiddleware(unittest.IsolatedAsyncioTestCase):
+
+    async def test_compresses_large_bodies(self):
+        body = contacts_page()
+        start, chunks = await run(Response(body, media_type="application/json", headers={"ETag": '"abc"'}))
+
+        compressed = b"".join(chunks)
+        self.assertEqual(header(start, "content-encoding"), "gzip")
+        self.assertEqual(header(start, "content-length"), str(len(compressed)))
+        self.assertEqual(header(start, "vary"), "Accept-Encoding")
+        self.assertEqual(header(start, "etag"), 'W/"abc"')
+        self.assertEqual(zlib.decompress(compressed, 16 + zlib.MAX_WBITS), body)
+
+    async def test_bytes_saved(self):
+        # The CPU cost is measured by benchmarks/compression.py, not asserted here.
+        body = contacts_page(5000)
+        _, chunks = await run(Response(body, media_type="application/json"))
+        self.assertGreater(1 - len(b"".join(chunks)) / len(body), 0.8)
+
+    async def test_skips_small_and_compressed_bodies(self):
+        for app in [Response(b"{}", media_type="application/json"),
+                    Response(b"\x89PNG" * 100, media_type="image/png"),
+                    Response(b"x" * 200, headers={"Content-Encoding": "br"}),
+                    Response(status_code=304)]:
+            start, _ = await run(app)
+            self.assertIn(header(start, "content-encoding"), (None, "br"))
+            self.assertIsNone(header(start, "vary"))
+
+    async def test_without_accept_encoding(self):
+        start, chunks = await run(Response(b"x" * 200), accept_encoding=None)
+        self.assertIsNone(header(start, "content-encoding"))
+        self.assertEqual(chunks, [b"x" * 200])
+
+    async def test_streams_chunk_by_chunk(self):
+        lines = [json.dumps({"id": i, "name": f"name{i}"}).encode() + b"\n" for i in range(3)]
+
+        async def ndjson():
+            for line in lines:
+                yield line
+
+        start, chunks = await run(StreamingResponse(ndjson(), media_type="application/x-ndjson"))
+        self.assertEqual(header(start, "content-encoding"), "gzip")
+        self.assertIsNone(header(start, "content-length"))
+        # Every chunk is flushed, so each line can be decoded as soon as it arrives.
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual([decompressor.decompress(chunk) for chunk in chunks[:3]], lines)
+        self.assertEqual(decompressor.decompress(b"".join(chunks[3:])), b"")
+        self.assertTrue(decompressor.eof)
+
+
+class TestNegotiate(unittest.TestCase):
+
+    def test_negotiate(self):
+        preferred = ["zstd", "br", "gzip"]
+        self.assertEqual(negotiate("gzip, deflate, br", preferred), "br")
+        self.assertEqual(negotiate("gzip;q=1.0, br;q=0.5", preferred), "gzip")
+        self.assertEqual(negotiate("*", preferred), "zstd")
+        self.assertEqual(negotiate("br;q=0, *;q=0.1", ["br", "gzip"]), "gzip")
+        self.assertIsNone(negotiate("identity", preferred))
+        self.assertIsNone(negotiate(None, preferred))
@@ -0,0 +1,99 @@
+import re
+import unittest
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.entity.models import Base, Note, Tag
+from src.entity.principal import Principal
+from src.repository import contacts as repository_contacts
+from src.repository import notes as repository_notes
+from src.repository import tags as repository_tags
+from src.repository import users as repository_users
+from src.schemas.schemas import ContactUpdate
+
+
+class TestQueryPlans(unittest.IsolatedAsyncioTestCase):
+    """
+    Run each repository query on SQLite and check with EXPLAIN QUERY PLAN that it reads through an index.
+    """
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_maker = async_sessionmaker(self.engine, expire_on_commit=False)
+        async with self.session_maker() as session:
+            session.add(Note(title="title", description="description", tags=[Tag(name="tag", user_id=1)], user_id=1))
+            await session.commit()
+        self.statements = []
+        event.listen(self.engine.sync_engine, "before_cursor_execute", self.record)
+        self.user = Principal(id=1, email="user@example.com", username="user", avatar=None, confirmed=True)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+    async def plans(self, query) -> list[list[str]]:
+        async with self.session_maker() as session:
+            await query(session)
+        statements, self.statements = self.statements, []
+        plans = []
+        async with self.engine.connect() as conn:
+            for statement, parameters in statements:
+                if statement.startswith(("SELECT", "UPDATE", "DELETE")):
+                    rows = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+                    plans.append([row.detail for row in rows])
+        return plans
+
+    async def assertIndexed(self, query, *indexes: str):
+        plans = await self.plans(query)
+        self.assertTrue(plans)
+        details = [detail for plan in plans for detail in plan]
+        for detail in details:
+            self.assertIsNone(re.fullmatch(r"SCAN \w+", detail), f"full table scan: {details}")
+        for index in indexes:
+            self.assertTrue(any(index in detail for detail in details), f"{index} not used: {details}")
+
+    async def test_contacts(self):
+        user = self.user
+        body = ContactUpdate(name="name", lastname="lastname", email="email", phone="1", address="address",
+                             birthday=date(2000, 1, 1))
+        await self.assertIndexed(lambda db: repository_contacts.get_contacts(10, 0, db, user),
+                                 "ix_contacts_user_id_id (user_id=?)")
+        await self.assertIndexed(lambda db: repository_contacts.get_contacts(10, 0, db, user, after=5),
+                                 "ix_contacts_user_id_id (user_id=? AND id>?)")
+        await self.assertIndexed(lambda db: repository_contacts.get_all_contacts(10, 0, db, after=5),
+                                 "INTEGER PRIMARY KEY (rowid>?)")
+        await self.assertIndexed(lambda db: repository_contacts.get_contact(1, db, user),
+                                 "INTEGER PRIMARY KEY (rowid=?)")
+        await self.assertIndexed(lambda db: repository_contacts.get_contacts_upcoming_birthdays(
+            db, user, 7, date(2023, 12, 28)), "ix_contacts_user_id_birthday_key")
+        await self.assertIndexed(lambda db: repository_contacts.get_upcoming_birthdays_page(
+            db, [(1201, 1207)], 10, (1, 1)), "ix_contacts_birthday_key")
+        await self.assertIndexed(lambda db: repository_contacts.update_contact(1, body, db, user),
+                                 "INTEGER PRIMARY KEY (rowid=?)")
+        await self.assertIndexed(lambda db: repository_contacts.delete_contact(1, db, user),
+                                 "INTEGER PRIMARY KEY (rowid=?)")
+
+    async def test_notes(self):
+        user = self.user
+        await self.assertIndexed(lambda db: repository_notes.get_notes(0, 10, db, user),
+                                 "ix_notes_user_id_id (user_id=?)")
+        await self.assertIndexed(lambda db: repository_notes.get_notes(0, 10, db, user, after=0),
+                                 "ix_notes_user_id_id (user_id=? AND id>?)", "sqlite_autoindex_note_tag_association_1")
+        await self.assertIndexed(lambda db: repository_notes.get_note(1, db, user),
+                                 "INTEGER PRIMARY KEY (rowid=?)", "sqlite_autoindex_note_tag_association_1")
+
+    async def test_tags(self):
+        user = self.user
+        await self.assertIndexed(lambda db: repository_tags.get_tags(0, 10, db, user, after=0),
+                                 "ix_tags_user_id_id (user_id=? AND id>?)")
+        await self.assertIndexed(lambda db: repository_tags.get_tag(1, db, user), "INTEGER PRIMARY KEY (rowid=?)")
+
+    async def test_users(self):
+        await self.assertIndexed(lambda db: repository_users.get_user_by_email("user@example.com", db),
+                                 "sqlite_autoindex_users_1")
@@ -1,19 +1,47 @@
 import unittest
+from datetime import date
 from unittest.mock import MagicMock, AsyncMock
 
+from sqlalchemy import Delete, Update
+from sqlalchemy.dialects.postgresql import asyncpg
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.entity.models import Contact, User
-from src.schemas.schemas import ContactBase
+from src.schemas.schemas import ContactBase, ContactResponse
 from src.repository.contacts import (
     create_contact,
     get_all_contacts,
     get_contact,
     update_contact,
     delete_contact,
+    upcoming_birthday_ranges,
+    search_contacts,
 )
 
 
+class TestUpcomingBirthdayRanges(unittest.TestCase):
+
+    def test_within_a_month(self):
+        self.assertEqual(upcoming_birthday_ranges(date(2023, 5, 10), 7), [(510, 517)])
+
+    def test_crossing_a_month(self):
+        self.assertEqual(upcoming_birthday_ranges(date(2023, 5, 28), 7), [(528, 604)])
+
+    def test_crossing_a_year(self):
+        self.assertEqual(upcoming_birthday_ranges(date(2023, 12, 28), 7), [(1228, 1231), (101, 104)])
+
+    def test_leap_day_in_common_year(self):
+        self.assertEqual(upcoming_birthday_ranges(date(2023, 2, 21), 7), [(221, 229)])
+        self.assertEqual(upcoming_birthday_ranges(date(2023, 2, 28), 0), [(228, 229)])
+        self.assertEqual(upcoming_birthday_ranges(date(2023, 3, 1), 0), [(301, 301)])
+
+    def test_leap_day_in_leap_year(self):
+        self.assertEqual(upcoming_birthday_ranges(date(2024, 2, 21), 7), [(221, 228)])
+
+    def test_whole_year(self):
+        self.assertEqual(upcoming_birthday_ranges(date(2023, 7, 1), 366), [(101, 1231)])
+
+
 class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self) -> None:
@@ -23,16 +51,33 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
     async def test_get_all_contacts(self):
         limit = 10
         offset = 0
-        contacts = [
-            Contact(id=1, name='test_name_1', email='test_email_1', user=self.user),
-            Contact(id=2, name='test_name_2', email='test_email_2', user=self.user)
+        rows = [
+            dict(id=1, name='test_name_1', lastname='test_lastname_1', email='test_email_1', phone='1',
+                 address='test_address_1', birthday=date(2000, 1, 1)),
+            dict(id=2, name='test_name_2', lastname='test_lastname_2', email='test_email_2', phone='2',
+                 address='test_address_2', birthday=None)
         ]
         mocked_contacts = MagicMock()
-        mocked_contacts.scalars.return_value.all.return_value = contacts
+        mocked_contacts.mappings.return_value = rows
         self.session.execute.return_value = mocked_contacts
 
         result = await get_all_contacts(limit, offset, self.session)
-        self.assertEqual(result, contacts)
+        self.assertEqual(result, [ContactResponse(**row) for row in rows])
+        sql = str(self.session.execute.call_args.args[0])
+        self.assertNotIn("users", sql)
+        self.assertNotIn("contacts.user_id", sql.split("FROM")[0])
+
+    async def test_get_all_contacts_after_cursor(self):
+        mocked_contacts = MagicMock()
+        mocked_contacts.mappings.return_value = []
+        self.session.execute.return_value = mocked_contacts
+
+        await get_all_contacts(10, 30, self.session, after=42)
+        stmt = self.session.execute.call_args.args[0]
+        sql = str(stmt.compile(compile_kwargs={"literal_binds": True}))
+        self.assertIn("contacts.id > 42", sql)
+        self.assertIn("ORDER BY contacts.id", sql)
+        self.assertNotIn("OFFSET", sql)
 
     async def test_get_contact(self):
         contact_id = 1
@@ -43,6 +88,7 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
 
         result = await get_contact(contact_id, self.session)
         self.assertEqual(result, contact)
+        self.assertNotIn("users", str(self.session.execute.call_args.args[0]))
 
     async def test_create_contact(self):
         body = ContactBase(
@@ -62,7 +108,7 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result.phone, body.phone)
         self.assertEqual(result.address, body.address)
         self.assertEqual(result.birthday, body.birthday)
-        self.assertEqual(result.user, self.user)
+        self.assertEqual(result.user_id, self.user.id)
 
     async def test_update_contact(self):
         contact_id = 1
@@ -74,14 +120,21 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
             address='updated_address',
             birthday='2001-01-01'
         )
-        existing_contact = Contact(id=contact_id, name='test_name', email='test_email', user=self.user)
+        updated = Contact(id=contact_id, user_id=self.user.id, **body.model_dump())
 
         mocked_contact = MagicMock()
-        mocked_contact.scalar_one_or_none.return_value = existing_contact
+        mocked_contact.scalar_one_or_none.return_value = updated
         self.session.execute.return_value = mocked_contact
 
         updated_contact = await update_contact(contact_id, body, self.session, self.user)
 
+        stmt = self.session.execute.call_args.args[0]
+        self.assertIsInstance(stmt, Update)
+        self.assertTrue(stmt._returning)
+        self.assertEqual(stmt.compile().params["birthday_key"], 101)
+        self.session.execute.assert_awaited_once()
+        self.session.commit.assert_awaited_once()
+        self.session.refresh.assert_not_awaited()
         self.assertIsInstance(updated_contact, Contact)
         self.assertEqual(updated_contact.name, body.name)
         self.assertEqual(updated_contact.email, body.email)
@@ -90,6 +143,16 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(updated_contact.address, body.address)
         self.assertEqual(updated_contact.birthday, body.birthday)
 
+    async def test_update_missing_contact(self):
+        body = ContactBase(name='updated_name', email='updated_email', lastname='updated_lastname',
+                           phone='updated_phone', address='updated_address', birthday='2001-01-01')
+        mocked_contact = MagicMock()
+        mocked_contact.scalar_one_or_none.return_value = None
+        self.session.execute.return_value = mocked_contact
+
+        self.assertIsNone(await update_contact(1, body, self.session, self.user))
+        self.session.commit.assert_not_awaited()
+
     async def test_delete_contact(self):
         contact_id = 1
         existing_contact = Contact(id=1, name='test_name', email='test_email', user=self.user)
@@ -100,5 +163,26 @@ class TestAsyncContacts(unittest.IsolatedAsyncioTestCase):
 
         result = await delete_contact(contact_id, self.session, self.user)
         self.assertEqual(result, existing_contact)
-        self.session.delete.assert_called_once()
+        self.assertIsInstance(self.session.execute.call_args.args[0], Delete)
+        self.session.execute.assert_awaited_once()
+        self.session.delete.assert_not_called()
         self.session.commit.assert_called_once()
+
+    async def test_search_contacts_postgres(self):
+        self.session.get_bind.return_value.dialect.name = "postgresql"
+        self.session.execute.return_value = MagicMock()
+
+        await search_contacts("Jo smi@", 10, self.session, self.user, after=(0.5, 3))
+        stmt = self.session.execute.call_args.args[0]
+        compiled = stmt.compile(dialect=asyncpg.dialect())
+        sql = str(compiled)
+        self.assertIn("contacts.search_vector @@ to_tsquery(", sql)
+        self.assertIn("<% contacts.search_text", sql)
+        self.assertIn("contacts.user_id = $5::INTEGER", sql)
+        self.assertIn("DESC, contacts.id", sql)
+        self.assertIn("jo:* & smi:*", compiled.params.values())
+        self.assertIn("Jo smi@", compiled.params.values())
+
+    async def test_search_without_words(self):
+        self.assertEqual(await search_contacts("@!", 10, self.session, self.user), [])
+        self.session.execute.assert_not_awaited()
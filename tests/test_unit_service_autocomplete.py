@@ -0,0 +1,134 @@
+import abc
+import unittest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fakeredis import FakeAsyncRedis
+from redis.commands.core import HashCommands
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.entity.models import Base, Contact
+from src.services.autocomplete import MemoryAutocomplete, RedisAutocomplete, contact_terms, rebuild
+
+
+def contact(contact_id: int, name: str, lastname: str, email: str) -> SimpleNamespace:
+    return SimpleNamespace(id=contact_id, name=name, lastname=lastname, email=email)
+
+
+class AutocompleteTests(abc.ABC):
+    """
+    Behaviour shared by every autocomplete backend.
+    """
+
+    @abc.abstractmethod
+    def make_index(self):
+        """
+        Create an empty index of the backend under test.
+        """
+
+    async def asyncSetUp(self):
+        self.index = self.make_index()
+        await self.index.add(1, [contact(1, "John", "Smith", "john@example.com"),
+                                 contact(2, "Johanna", "Doe", "jd@example.com"),
+                                 contact(3, "Ольга", "Петренко", "olga@example.com")])
+        await self.index.add(2, [contact(4, "John", "Other", "other@example.com")])
+
+    async def test_prefix(self):
+        self.assertEqual(await self.index.complete(1, "Joh"), [
+            {"id": 2, "label": "Johanna Doe <jd@example.com>"},
+            {"id": 1, "label": "John Smith <john@example.com>"},
+        ])
+        self.assertEqual([s["id"] for s in await self.index.complete(1, "smi")], [1])
+        self.assertEqual([s["id"] for s in await self.index.complete(1, "john s")], [1])
+        self.assertEqual([s["id"] for s in await self.index.complete(1, "оль")], [3])
+        self.assertEqual(await self.index.complete(1, "x"), [])
+
+    async def test_per_user(self):
+        self.assertEqual([s["id"] for s in await self.index.complete(2, "john")], [4])
+        self.assertEqual(await self.index.complete(3, "john"), [])
+
+    async def test_limit_counts_contacts(self):
+        # "john" matches both the first name and the email of contact 1
+        self.assertEqual([s["id"] for s in await self.index.complete(1, "j", limit=2)], [2, 1])
+        self.assertEqual(len(await self.index.complete(1, "j", limit=1)), 1)
+
+    async def test_update_replaces_entries(self):
+        await self.index.add(1, [contact(1, "Jack", "Smith", "jack@example.com")])
+        self.assertEqual([s["id"] for s in await self.index.complete(1, "joh")], [2])
+        self.assertEqual(await self.index.complete(1, "jack"), [{"id": 1, "label": "Jack Smith <jack@example.com>"}])
+
+    async def test_remove(self):
+        await self.index.remove(1, 1, 2)
+        self.assertEqual(await self.index.complete(1, "j"), [])
+        self.assertEqual([s["id"] for s in await self.index.complete(2, "j")], [4])
+
+    async def test_clear(self):
+        await self.index.clear()
+        self.assertEqual(await self.index.complete(1, "j"), [])
+
+
+class TestMemoryAutocomplete(AutocompleteTests, unittest.IsolatedAsyncioTestCase):
+
+    def make_index(self):
+        return MemoryAutocomplete()
+
+
+class TestRedisAutocomplete(AutocompleteTests, unittest.IsolatedAsyncioTestCase):
+
+    def make_index(self):
+        return RedisAutocomplete(FakeAsyncRedis())
+
+    async def test_concurrent_updates_leave_no_orphans(self):
+        other = RedisAutocomplete(self.index.client)
+        hmget = HashCommands.hmget
+        interleaved = []
+
+        async def interleaving_hmget(client, *args):
+            previous = await hmget(client, *args)
+            if not interleaved:
+                interleaved.append(True)
+                await other.add(1, [contact(1, "Jack", "Smith", "john@example.com")])
+            return previous
+
+        with patch.object(HashCommands, "hmget", interleaving_hmget):
+            await self.index.add(1, [contact(1, "Jim", "Smith", "john@example.com")])
+
+        self.assertEqual(await self.index.complete(1, "ja"), [])
+        self.assertEqual(await self.index.complete(1, "ji"), [{"id": 1, "label": "Jim Smith <john@example.com>"}])
+        self.assertEqual(await self.index.client.zcard("autocomplete:1"), 3 * 4)
+
+    async def test_redis_errors_are_not_raised(self):
+        index = RedisAutocomplete(FakeAsyncRedis(connected=False))
+        await index.add(1, [contact(1, "John", "Smith", "john@example.com")])
+        await index.remove(1, 1)
+        self.assertEqual(await index.complete(1, "john"), [])
+
+
+class TestRebuild(unittest.IsolatedAsyncioTestCase):
+
+    async def test_rebuild_from_contacts(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as session:
+            session.add_all(Contact(name=f"name{i}", lastname="lastname", email=f"contact{i}@example.com",
+                                    phone="1", address="address", birthday=date(2000, 1, 1), user_id=i % 2 + 1)
+                            for i in range(5))
+            await session.commit()
+        index = MemoryAutocomplete()
+        await index.add(1, [contact(99, "Stale", "Entry", "stale@example.com")])
+
+        self.assertEqual(await rebuild(index, session_maker, batch_size=2), 5)
+        self.assertEqual(await index.complete(1, "stale"), [])
+        self.assertEqual([s["id"] for s in await index.complete(1, "name")], [1, 3, 5])
+        self.assertEqual([s["id"] for s in await index.complete(2, "contact")], [2, 4])
+        await engine.dispose()
+
+
+class TestContactTerms(unittest.TestCase):
+
+    def test_terms(self):
+        self.assertEqual(contact_terms(contact(1, "John", "Smith", "John@Example.com")),
+                         ["john", "john smith", "john@example.com", "smith"])
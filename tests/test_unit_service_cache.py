@@ -0,0 +1,178 @@
+import pickle
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.entity.models import Base, Tag, User
+from src.entity.principal import Principal
+from src.services.cache import LRUCache, TagCache, UserCache
+
+
+class TestPrincipal(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.user = User(id=1, username="test_user", email="test@example.com", password="hash",
+                         refresh_token="token", avatar=None, confirmed=True)
+
+    def test_round_trip(self):
+        principal = Principal.from_user(self.user)
+
+        self.assertEqual(Principal.loads(principal.dumps()), principal)
+        self.assertNotIn(b"hash", principal.dumps())
+        self.assertNotIn(b"token", principal.dumps())
+
+    def test_smaller_than_pickled_user(self):
+        principal = Principal.from_user(self.user)
+        self.assertLess(len(principal.dumps()), len(pickle.dumps(self.user)))
+
+    def test_unknown_version_is_a_miss(self):
+        self.assertIsNone(Principal.loads(b'[0,1,"test@example.com","test_user",null,true]'))
+        self.assertIsNone(Principal.loads(pickle.dumps(self.user)))
+
+    def test_malformed_value_is_a_miss(self):
+        self.assertIsNone(Principal.loads(b'[1,1,"test@example.com"]'))
+        self.assertIsNone(Principal.loads(b'[1,1,"test@example.com","test_user",null,true,"extra"]'))
+        self.assertIsNone(Principal.loads(b'[]'))
+        self.assertIsNone(Principal.loads(b'1'))
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_expires_entries(self):
+        cache = LRUCache(maxsize=2, ttl=10)
+        with patch("src.services.cache.time.monotonic", return_value=100):
+            cache.set("a", 1)
+        with patch("src.services.cache.time.monotonic", return_value=111):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class TestAsyncUserCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.client = AsyncMock()
+        self.cache = UserCache(self.client, ttl=600)
+
+    def mock_pipeline(self):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock()
+        self.client.pipeline = MagicMock()
+        self.client.pipeline.return_value.__aenter__.return_value = pipe
+        return pipe
+
+    async def test_get(self):
+        self.client.get.return_value = pickle.dumps("user")
+
+        result = await self.cache.get("test@example.com")
+        self.assertEqual(result, "user")
+        self.client.get.assert_awaited_once_with("user:test@example.com")
+
+    async def test_set_with_expiry_in_one_command(self):
+        await self.cache.set("test@example.com", "user")
+
+        self.client.set.assert_awaited_once_with("user:test@example.com", pickle.dumps("user"), ex=600)
+        self.client.expire.assert_not_called()
+
+    async def test_local_hit_skips_redis(self):
+        cache = UserCache(self.client, ttl=600, local=LRUCache(maxsize=10, ttl=30))
+        self.client.get.return_value = pickle.dumps("user")
+
+        self.assertEqual(await cache.get("test@example.com"), "user")
+        self.assertEqual(await cache.get("test@example.com"), "user")
+        self.client.get.assert_awaited_once()
+
+    async def test_redis_errors_are_misses(self):
+        cache = UserCache(self.client, ttl=600, local=LRUCache(maxsize=10, ttl=30))
+        self.client.get.side_effect = ConnectionError()
+        self.client.set.side_effect = ConnectionError()
+
+        self.assertIsNone(await cache.get("test@example.com"))
+        await cache.set("test@example.com", "user")
+        self.assertEqual(await cache.get("test@example.com"), "user")
+
+    async def test_invalidate_is_pipelined(self):
+        pipe = self.mock_pipeline()
+
+        await self.cache.invalidate("a@example.com", "b@example.com")
+
+        self.client.pipeline.assert_called_once_with(transaction=False)
+        self.assertEqual(pipe.delete.call_count, 2)
+        self.assertEqual(pipe.publish.call_count, 2)
+        pipe.execute.assert_awaited_once()
+
+    async def test_invalidate_evicts_local_tier_when_redis_is_down(self):
+        cache = UserCache(self.client, ttl=600, local=LRUCache(maxsize=10, ttl=30))
+        cache.local.set("test@example.com", "user")
+        pipe = self.mock_pipeline()
+        pipe.execute.side_effect = ConnectionError()
+
+        await cache.invalidate("test@example.com")
+        self.assertIsNone(cache.local.get("test@example.com"))
+
+
+class TestTagCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.client = FakeAsyncRedis()
+        self.cache = TagCache(self.client, ttl=600)
+
+    async def test_get_many(self):
+        await self.cache.set_many({1: {1: "work", 2: "home"}, 2: {3: "work"}})
+
+        self.assertEqual(await self.cache.get_many(1, [2, 3, 1]), {1: "work", 2: "home"})
+        self.assertEqual(await self.cache.get_many(2, [3]), {3: "work"})
+        self.assertEqual(await self.cache.get_many(1, []), {})
+        self.assertEqual(await self.client.ttl("tags:1"), 600)
+
+    async def test_fills_do_not_extend_ttl(self):
+        await self.cache.set_many({1: {1: "work"}})
+        await self.client.expire("tags:1", 10)
+        await self.cache.set_many({1: {2: "home"}})
+        self.assertLessEqual(await self.client.ttl("tags:1"), 10)
+
+    async def test_delete(self):
+        await self.cache.set_many({1: {1: "work", 2: "home"}})
+        await self.cache.delete(1, 1)
+        self.assertEqual(await self.cache.get_many(1, [1, 2]), {2: "home"})
+
+    async def test_redis_errors_are_not_raised(self):
+        cache = TagCache(FakeAsyncRedis(connected=False), ttl=600)
+        await cache.set_many({1: {1: "work"}})
+        await cache.delete(1, 1)
+        self.assertEqual(await cache.get_many(1, [1]), {})
+
+    async def test_warm(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as session:
+            session.add_all(Tag(name=f"tag{i}", user_id=i % 2 + 1) for i in range(5))
+            await session.commit()
+
+        self.assertEqual(await self.cache.warm(session_maker, batch_size=2), 5)
+        self.assertEqual(await self.cache.get_many(1, [1, 2, 3]), {1: "tag0", 3: "tag2"})
+        self.assertEqual(await self.cache.get_many(2, [2, 4]), {2: "tag1", 4: "tag3"})
+        # Another process starting within the TTL does not scan the table again
+        self.assertEqual(await self.cache.warm(session_maker), 0)
+        await engine.dispose()
+
+    async def test_warm_errors_are_not_raised(self):
+        engine = create_async_engine("sqlite+aiosqlite://")
+        self.assertEqual(await self.cache.warm(async_sessionmaker(engine)), 0)
+        await engine.dispose()
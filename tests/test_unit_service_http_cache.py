@@ -0,0 +1,89 @@
+import unittest
+
+from fakeredis import FakeAsyncRedis
+from fastapi import Request, Response
+
+from src.schemas.schemas import TagResponse
+from src.services.http_cache import ResponseCache, etag_matches
+
+
+def request(path: str, query: str = "", etag: str | None = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+                    "headers": headers})
+
+
+class TestResponseCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cache = ResponseCache(FakeAsyncRedis(), ttl=60)
+
+    async def render(self, req: Request, name: str = "tag") -> Response:
+        cached = await self.cache.lookup(req, 1)
+        if cached.hit:
+            return cached.response()
+        return await cached.render({"id": 1, "name": name}, TagResponse, Response())
+
+    async def test_hit_and_not_modified(self):
+        first = await self.render(request("/api/tags/1"))
+        self.assertEqual(first.body, b'{"name":"tag","id":1}')
+
+        cached = await self.cache.lookup(request("/api/tags/1"), 1)
+        self.assertTrue(cached.hit)
+        self.assertEqual(cached.response().body, first.body)
+        self.assertFalse((await self.cache.lookup(request("/api/tags/1"), 2)).hit)
+        self.assertFalse((await self.cache.lookup(request("/api/tags/1", "a=1"), 1)).hit)
+
+        etag = first.headers["etag"]
+        self.assertEqual((await self.render(request("/api/tags/1", etag=etag))).status_code, 304)
+
+    async def test_query_order_does_not_matter(self):
+        await self.render(request("/api/tags", "limit=3&skip=0"))
+        self.assertTrue((await self.cache.lookup(request("/api/tags", "skip=0&limit=3"), 1)).hit)
+
+    async def test_invalidate(self):
+        first = await self.render(request("/api/tags/1"))
+        await self.cache.invalidate(1)
+        self.assertFalse((await self.cache.lookup(request("/api/tags/1"), 1)).hit)
+
+        # A changed body gets a new ETag, an unchanged one keeps it.
+        changed = await self.render(request("/api/tags/1", etag=first.headers["etag"]), name="renamed")
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["etag"], first.headers["etag"])
+
+    async def test_replica_reads_are_not_stored_right_after_a_write(self):
+        cache = ResponseCache(FakeAsyncRedis(), ttl=60, lag=5)
+        await cache.invalidate(1)
+        cached = await cache.lookup(request("/api/tags/1"), 1, primary=False)
+        await cached.render({"id": 1, "name": "stale"}, TagResponse, Response())
+        self.assertFalse((await cache.lookup(request("/api/tags/1"), 1)).hit)
+
+        # The writer reads from the primary, so its page is stored.
+        cached = await cache.lookup(request("/api/tags/1"), 1, primary=True)
+        await cached.render({"id": 1, "name": "fresh"}, TagResponse, Response())
+        self.assertEqual((await cache.lookup(request("/api/tags/1"), 1)).response().body, b'{"name":"fresh","id":1}')
+
+    async def test_replica_reads_are_stored_once_replicas_caught_up(self):
+        cache = ResponseCache(FakeAsyncRedis(), ttl=60, lag=0)
+        await cache.invalidate(1)
+        cached = await cache.lookup(request("/api/tags/1"), 1, primary=False)
+        await cached.render({"id": 1, "name": "tag"}, TagResponse, Response())
+        self.assertTrue((await cache.lookup(request("/api/tags/1"), 1)).hit)
+
+    async def test_redis_errors_are_not_raised(self):
+        cache = ResponseCache(FakeAsyncRedis(connected=False), ttl=60)
+        cached = await cache.lookup(request("/api/tags/1"), 1)
+        self.assertFalse(cached.hit)
+        response = await cached.render({"id": 1, "name": "tag"}, TagResponse, Response())
+        self.assertEqual(response.status_code, 200)
+        await cache.invalidate(1)
+
+
+class TestEtagMatches(unittest.TestCase):
+
+    def test_matches(self):
+        self.assertTrue(etag_matches('"a"', '"a"'))
+        self.assertTrue(etag_matches('"b", W/"a"', '"a"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+        self.assertFalse(etag_matches(None, '"a"'))
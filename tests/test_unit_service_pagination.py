@@ -0,0 +1,48 @@
+import unittest
+
+from fastapi import HTTPException, Response
+
+from src.entity.models import Tag
+from src.services.pagination import after_cursor, decode_cursor, encode_cursor, ranked_cursor, set_next_cursor
+
+
+class TestPagination(unittest.TestCase):
+
+    def test_round_trip(self):
+        cursor = encode_cursor(42)
+
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), [42])
+        self.assertEqual(after_cursor(cursor), 42)
+
+    def test_first_page(self):
+        self.assertIsNone(after_cursor(None))
+
+    def test_invalid_cursor(self):
+        for cursor in ["not a cursor", encode_cursor("42"), encode_cursor(1, 2)]:
+            with self.assertRaises(HTTPException) as ctx:
+                after_cursor(cursor)
+            self.assertEqual(ctx.exception.status_code, 400)
+
+    def test_next_cursor_only_on_full_pages(self):
+        tags = [Tag(id=1, name="a"), Tag(id=2, name="b")]
+
+        response = Response()
+        set_next_cursor(response, tags, 2)
+        self.assertEqual(decode_cursor(response.headers["X-Next-Cursor"]), [2])
+
+        response = Response()
+        set_next_cursor(response, tags, 10)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+    def test_ranked_cursor(self):
+        response = Response()
+        set_next_cursor(response, [Tag(id=7, name="a")], 1, key=lambda tag: (0.25, tag.id))
+        cursor = response.headers["X-Next-Cursor"]
+
+        self.assertEqual(ranked_cursor(cursor), (0.25, 7))
+        self.assertIsNone(ranked_cursor(None))
+        for cursor in [encode_cursor(7), encode_cursor("0.25", 7), encode_cursor(0.25, 7.5)]:
+            with self.assertRaises(HTTPException) as ctx:
+                ranked_cursor(cursor)
+            self.assertEqual(ctx.exception.status_code, 400)
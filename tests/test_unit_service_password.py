@@ -0,0 +1,50 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from src.services.password import PasswordHasher
+
+
+def slow_hash(password: str, rounds: int) -> str:
+    time.sleep(0.05)
+    return password
+
+
+class TestAsyncPasswordHasher(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.hasher = PasswordHasher(rounds=4, workers=2, max_concurrency=2)
+
+    def tearDown(self) -> None:
+        self.hasher.shutdown()
+
+    async def test_hash_and_verify(self):
+        hashed = await self.hasher.hash("12345678")
+
+        self.assertTrue(hashed.startswith("$2b$04$"))
+        self.assertTrue(await self.hasher.verify("12345678", hashed))
+        self.assertFalse(await self.hasher.verify("password", hashed))
+        self.assertEqual(self.hasher.stats()["completed"], 3)
+
+    async def test_concurrency_cap(self):
+        with patch("src.services.password._hash", slow_hash):
+            tasks = [asyncio.create_task(self.hasher.hash(str(i))) for i in range(5)]
+            await asyncio.sleep(0.01)
+            stats = self.hasher.stats()
+            self.assertEqual(stats["running"], 2)
+            self.assertEqual(stats["waiting"], 3)
+            await asyncio.gather(*tasks)
+
+        stats = self.hasher.stats()
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(stats["waiting"], 0)
+        self.assertGreater(stats["wait_time"], 0)
+
+    async def test_event_loop_stays_responsive(self):
+        with patch("src.services.password._hash", slow_hash):
+            task = asyncio.create_task(self.hasher.hash("12345678"))
+            start = time.perf_counter()
+            await asyncio.sleep(0)
+            self.assertLess(time.perf_counter() - start, 0.05)
+            await task
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+
+from src.services.queue import JobQueue, worker_id
+
+
+class TestAsyncJobQueue(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self) -> None:
+        self.client = FakeAsyncRedis()
+        self.queue = JobQueue(self.client, "queue:test", max_attempts=2, backoff=2)
+        self.handler = AsyncMock()
+        self.queue.task("greet")(self.handler)
+
+    async def test_enqueue_and_run(self):
+        await self.queue.enqueue("greet", name="deadpool")
+        self.assertEqual(await self.queue.depth(), {"pending": 1, "delayed": 0, "dead": 0})
+
+        self.assertTrue(await self.queue.run_once("worker"))
+        self.handler.assert_awaited_once_with(name="deadpool")
+        self.assertEqual(await self.queue.depth(), {"pending": 0, "delayed": 0, "dead": 0})
+        self.assertEqual(await self.client.llen("queue:test:processing:worker"), 0)
+
+    async def test_empty_queue(self):
+        self.assertFalse(await self.queue.run_once("worker", timeout=0.01))
+
+    async def test_retry_with_backoff_then_dead_letter(self):
+        self.handler.side_effect = ConnectionError("smtp down")
+        await self.queue.enqueue("greet", name="deadpool")
+
+        with patch("src.services.queue.time.time", return_value=1000):
+            await self.queue.run_once("worker")
+        self.assertEqual(await self.queue.depth(), {"pending": 0, "delayed": 1, "dead": 0})
+        delayed = await self.client.zrange("queue:test:delayed", 0, -1, withscores=True)
+        self.assertEqual(delayed[0][1], 1002)
+
+        with patch("src.services.queue.time.time", return_value=1001):
+            self.assertEqual(await self.queue.promote(), 0)
+        with patch("src.services.queue.time.time", return_value=1002):
+            await self.queue.run_once("worker")
+
+        self.assertEqual(await self.queue.depth(), {"pending": 0, "delayed": 0, "dead": 1})
+        job = json.loads(await self.client.lindex("queue:test:dead", 0))
+        self.assertEqual(job["attempts"], 2)
+        self.assertIn("smtp down", job["error"])
+
+    async def test_recover_jobs_of_a_crashed_worker(self):
+        await self.queue.enqueue("greet", name="deadpool")
+        await self.client.lmove("queue:test:pending", "queue:test:processing:worker", "RIGHT", "LEFT")
+
+        self.assertEqual(await self.queue.recover("worker"), 1)
+        self.assertEqual(await self.queue.depth(), {"pending": 1, "delayed": 0, "dead": 0})
+
+    async def test_work_survives_redis_errors(self):
+        await self.queue.enqueue("greet", name="deadpool")
+        blmove = self.client.blmove
+        calls = [ConnectionError("redis down"), ConnectionError("redis down"), None, asyncio.CancelledError()]
+
+        async def flaky_blmove(*args):
+            outcome = calls.pop(0)
+            if outcome is not None:
+                raise outcome
+            return await blmove(*args)
+
+        with patch.object(self.client, "blmove", flaky_blmove), \
+                patch("src.services.queue.asyncio.sleep", AsyncMock()) as sleep:
+            with self.assertRaises(asyncio.CancelledError):
+                await self.queue.work("worker")
+
+        self.handler.assert_awaited_once_with(name="deadpool")
+        delays = [call.args[0] for call in sleep.await_args_list if call.args[0] != self.queue.lease / 3]
+        self.assertEqual(len(delays), 2)
+        self.assertLessEqual(delays[0], 0.2)
+        self.assertLessEqual(delays[1], 0.4)
+
+    async def test_reclaim_jobs_of_expired_workers(self):
+        await self.queue.enqueue("greet", name="deadpool")
+        await self.queue.enqueue("greet", name="wolverine")
+        await self.client.lmove("queue:test:pending", "queue:test:processing:gone", "RIGHT", "LEFT")
+        await self.client.lmove("queue:test:pending", "queue:test:processing:alive", "RIGHT", "LEFT")
+        await self.queue.heartbeat("alive")
+
+        self.assertEqual(await self.queue.reclaim(), 1)
+        self.assertEqual(await self.client.llen("queue:test:processing:alive"), 1)
+        self.assertEqual(await self.queue.depth(), {"pending": 1, "delayed": 0, "dead": 0})
+
+    async def test_lease_expires(self):
+        self.queue.lease = 0.05
+        await self.queue.heartbeat("worker")
+        self.assertTrue(await self.client.exists("queue:test:lease:worker"))
+        await asyncio.sleep(0.1)
+        self.assertFalse(await self.client.exists("queue:test:lease:worker"))
+
+    def test_worker_id_is_unique_per_process(self):
+        self.assertNotEqual(worker_id("host"), worker_id("host"))
+        self.assertTrue(worker_id("host").startswith("host:"))
@@ -0,0 +1,40 @@
+import unittest
+from datetime import date, datetime
+from typing import List, Optional
+from unittest.mock import patch
+
+from src.entity.models import Contact, Note, Tag
+from src.schemas.schemas import ContactResponse, NoteResponse, TagResponse
+from src.services.serialization import construct, dump_json, json_response
+
+
+class TestSerialization(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.note = Note(id=1, title="title", description="description", created_at=datetime(2024, 1, 2, 3, 4, 5),
+                         tags=[Tag(id=2, name="work")])
+        self.contact = Contact(id=3, name="name", lastname="lastname", email="email@example.com", phone="123",
+                               address="address", birthday=date(1990, 1, 1))
+
+    def test_construct_nested(self):
+        note = construct(NoteResponse, self.note)
+
+        self.assertIsInstance(note, NoteResponse)
+        self.assertEqual(note.tags, [TagResponse(id=2, name="work")])
+        self.assertIsNone(construct(Optional[NoteResponse], None))
+        self.assertIsInstance(construct(Optional[NoteResponse], self.note), NoteResponse)
+
+    def test_construct_from_mappings(self):
+        row = {"id": 2, "name": "work", "user_id": 1}
+        self.assertEqual(construct(List[TagResponse], [row]), [TagResponse(id=2, name="work")])
+
+    def test_fast_path_matches_validation(self):
+        for model, content in [(List[NoteResponse], [self.note]), (ContactResponse, self.contact)]:
+            validated = dump_json(content, model)
+            with patch("src.services.serialization.config.FAST_JSON", True):
+                self.assertEqual(dump_json(content, model), validated)
+
+    def test_json_response(self):
+        response = json_response([self.note], List[NoteResponse])
+        self.assertEqual(response.media_type, "application/json")
+        self.assertEqual(response.body, b'[{"id":1,"created_at":"2024-01-02T03:04:05","tags":[{"name":"work","id":2}]}]')
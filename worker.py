@@ -0,0 +1,18 @@
+import asyncio
+import socket
+
+from src.conf.config import config
+from src.services.email import email_queue
+from src.services.queue import worker_id
+
+
+async def main():
+    """
+    Worker entry point.
+    Run queued email jobs until stopped.
+    """
+    await email_queue.work(worker_id(config.WORKER_ID or socket.gethostname()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())